@@ -0,0 +1,67 @@
+"""Time run-to-run diffs on large synthetic snapshots.
+
+Usage:
+    python -m benchmarks.diff_bench [--rows 1000000]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from molharbor.diff import diff_hits, diff_offers
+from molharbor.ids import decode_ids
+
+
+def hits_snapshot(rng: np.random.Generator, n_rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "query": [f"C{i % 100_000}O" for i in range(n_rows)],
+            "molport_id": decode_ids(pd.Series(rng.integers(1, 10**9, n_rows))),
+        }
+    )
+
+
+def offers_snapshot(rng: np.random.Generator, n_rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "molport_id": decode_ids(pd.Series(rng.integers(1, 10**9, n_rows))),
+            "catalog_id": rng.integers(1, 10**6, n_rows),
+            "amount": rng.choice([1.0, 5.0, 10.0, 50.0], n_rows),
+            "measure_id": rng.integers(1, 4, n_rows),
+            "price": rng.uniform(10, 500, n_rows).round(2),
+            "stock": rng.integers(0, 1000, n_rows),
+            "delivery_days": rng.integers(1, 30, n_rows),
+        }
+    )
+
+
+def bench(name: str, func) -> None:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    counts = result["change"].value_counts().to_dict()
+    print(f"  {name:<8} {elapsed:8.2f} s  {counts}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    n_changes = max(args.rows // 1000, 1)
+
+    old_hits = hits_snapshot(rng, args.rows)
+    new_hits = pd.concat(
+        [old_hits.iloc[n_changes:], hits_snapshot(rng, n_changes)], ignore_index=True
+    )
+    old_offers = offers_snapshot(rng, args.rows)
+    new_offers = old_offers.iloc[n_changes:].copy()
+    new_offers.iloc[:n_changes, new_offers.columns.get_loc("price")] += 1.0
+
+    print(f"{args.rows} rows, {n_changes} changes")
+    bench("hits", lambda: diff_hits(old_hits, new_hits))
+    bench("offers", lambda: diff_offers(old_offers, new_offers))
+
+
+if __name__ == "__main__":
+    main()
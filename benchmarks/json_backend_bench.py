@@ -0,0 +1,80 @@
+"""Compare response decoding paths on large synthetic Molport payloads.
+
+Usage:
+    python -m benchmarks.json_backend_bench [--molecules 10000] [--suppliers 200]
+"""
+
+import argparse
+import copy
+import json
+import timeit
+from molharbor import json_backend
+from molharbor.data import Response, ResponseSupplier
+
+SUP_SEARCH_SUCCESS = "tests/data/suppliers_search.json"
+
+MOLECULE = {
+    "Id": 2266780,
+    "MolPort Id": "Molport-002-266-780",
+    "SMILES": "Cc1ccc(cc1)C(=O)OCc1ccc(cc1)C#N",
+    "Canonical SMILES": "Cc1ccc(cc1)C(=O)OCc1ccc(cc1)C#N",
+    "Verified Amount": 100,
+    "Unverified Amount": 100,
+    "Similarity Index": 0.80487806,
+}
+
+
+def search_payload(n_molecules: int) -> bytes:
+    data = {
+        "Result": {"Status": 1, "Message": "Similarity search completed!"},
+        "Data": {"Version": "v.3.0.2", "Molecules": [MOLECULE] * n_molecules},
+    }
+    return json.dumps(data).encode()
+
+
+def supplier_payload(n_suppliers: int) -> bytes:
+    with open(SUP_SEARCH_SUCCESS) as f:
+        data = json.load(f)
+    catalogues = data["Data"]["Molecule"]["Catalogues"]
+    suppliers = catalogues["Screening Block Suppliers"]
+    catalogues["Screening Block Suppliers"] = [
+        copy.deepcopy(suppliers[i % len(suppliers)]) for i in range(n_suppliers)
+    ]
+    return json.dumps(data).encode()
+
+
+def bench(name: str, func, number: int) -> None:
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {name:<28} {best * 1000:8.2f} ms")
+
+
+def run(model, content: bytes, number: int) -> None:
+    bench("stdlib json + Model(**d)", lambda: model(**json.loads(content)), number)
+    for backend in json_backend.available_backends():
+        json_backend.set_backend(backend)
+        bench(
+            f"{backend} + model_validate",
+            lambda: model.model_validate(json_backend.loads(content)),
+            number,
+        )
+    bench("parse_model", lambda: json_backend.parse_model(model, content), number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--molecules", type=int, default=10000)
+    parser.add_argument("--suppliers", type=int, default=200)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    content = search_payload(args.molecules)
+    print(f"Search response, {args.molecules} molecules, {len(content)} bytes")
+    run(Response, content, args.number)
+
+    content = supplier_payload(args.suppliers)
+    print(f"Supplier response, {args.suppliers} suppliers, {len(content)} bytes")
+    run(ResponseSupplier, content, args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from .checker import Molport, MolportCompound
 from .data import Molecule
 from .enums import SearchType, ResultStatus
+from . import accessor  # noqa: F401, registers `DataFrame.molharbor`
 
 
 __all__ = [
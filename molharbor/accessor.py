@@ -0,0 +1,124 @@
+from typing import List, Optional, Union
+import pandas as pd
+from molharbor.batch import Errors, map_concurrent
+from molharbor.checker import Molport
+from molharbor.concurrency import AdaptiveLimiter
+from molharbor.enums import Priority, SearchType
+from molharbor.ids import decode_id, encode_ids
+from molharbor.pricing import concat_suppliers
+from molharbor.scheduler import request_priority
+from molharbor.schema import DtypeBackend
+
+HIT_COLUMNS = ["molport_id", "molport_smiles", "link"]
+
+
+@pd.api.extensions.register_dataframe_accessor("molharbor")
+class MolharborAccessor:
+    """Batch Molport lookups over a DataFrame column, available as `df.molharbor`.
+
+    Unique values of the column are queried concurrently, and results are returned
+    in long format (one row per hit or supplier packing) indexed by the source index.
+    """
+
+    def __init__(self, pandas_obj: pd.DataFrame):
+        self._obj = pandas_obj
+
+    def _column(self, column: str) -> pd.Series:
+        if column not in self._obj:
+            raise KeyError(f"Column {column} is not in the DataFrame")
+        return self._obj[column].dropna()
+
+    def find(
+        self,
+        molport: Molport,
+        column: str = "smiles",
+        *,
+        search_type: Union[SearchType, int] = SearchType.EXACT_FRAGMENT,
+        max_workers: Optional[int] = None,
+        errors: Errors = "raise",
+        limiter: Optional[AdaptiveLimiter] = None,
+        priority: Priority = Priority.BULK,
+        int_ids: bool = False,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Find compounds for every SMILES in `column`
+
+        Args:
+            molport (Molport): logged in Molport client
+            column (str, optional): column with SMILES. Defaults to "smiles".
+            search_type (Union[SearchType, int], optional): search type. Defaults to SearchType.EXACT_FRAGMENT.
+            max_workers (Optional[int], optional): number of worker threads. Defaults to 8, or `limiter.max_limit` if limiter is given.
+            errors (Errors, optional): "raise" or "ignore" failed queries. Defaults to "raise".
+            limiter (Optional[AdaptiveLimiter], optional): adaptive limit of concurrent requests. Defaults to None.
+            priority (Priority, optional): priority of the requests if the client has a scheduler. Defaults to Priority.BULK.
+            int_ids (bool, optional): store `molport_id` as integers and omit `link`, which could be restored from the id. Defaults to False.
+            **kwargs: other arguments of `Molport.find`, e.g. `max_results` or `similarity`
+
+        Returns:
+            pd.DataFrame: `column`, `molport_id`, `molport_smiles` and `link` of each hit, indexed by the source index. Rows without hits have missing values.
+        """
+        queries = self._column(column)
+        with request_priority(priority):
+            found = map_concurrent(
+                lambda smiles: molport.find(smiles, search_type=search_type, **kwargs),
+                queries,
+                max_workers=max_workers,
+                errors=errors,
+                limiter=limiter,
+            )
+        records: List[tuple] = [
+            (query, hit.molport_id, hit.smiles, hit.link)
+            for query, hits in found.items()
+            for hit in hits
+        ]
+        hits = pd.DataFrame.from_records(records, columns=["query", *HIT_COLUMNS])
+        if int_ids:
+            hits["molport_id"] = encode_ids(hits["molport_id"])
+            hits = hits.drop(columns="link")
+        return queries.to_frame().join(hits.set_index("query"), on=column)
+
+    def suppliers(
+        self,
+        molport: Molport,
+        column: str = "molport_id",
+        *,
+        max_workers: Optional[int] = None,
+        errors: Errors = "raise",
+        limiter: Optional[AdaptiveLimiter] = None,
+        priority: Priority = Priority.BULK,
+        dtype_backend: DtypeBackend = "numpy_nullable",
+    ) -> pd.DataFrame:
+        """Get suppliers for every Molport ID in `column`
+
+        Args:
+            molport (Molport): logged in Molport client
+            column (str, optional): column with Molport IDs, either strings or integers (see `molharbor.ids`). Defaults to "molport_id".
+            max_workers (Optional[int], optional): number of worker threads. Defaults to 8, or `limiter.max_limit` if limiter is given.
+            errors (Errors, optional): "raise" or "ignore" failed queries. Defaults to "raise".
+            limiter (Optional[AdaptiveLimiter], optional): adaptive limit of concurrent requests. Defaults to None.
+            priority (Priority, optional): priority of the requests if the client has a scheduler. Defaults to Priority.BULK.
+            dtype_backend (DtypeBackend, optional): "numpy_nullable" or "pyarrow". Defaults to "numpy_nullable".
+
+        Returns:
+            pd.DataFrame: supplier packings of each compound, indexed by the source index. Rows without suppliers have missing values.
+        """
+        ids = self._column(column)
+        int_ids = pd.api.types.is_integer_dtype(ids)
+
+        def get_suppliers(molport_id):
+            if int_ids:
+                molport_id = decode_id(molport_id)
+            return molport.get_suppliers(molport_id)
+
+        with request_priority(priority):
+            frames = map_concurrent(
+                get_suppliers,
+                ids,
+                max_workers=max_workers,
+                errors=errors,
+                limiter=limiter,
+            )
+        suppliers = concat_suppliers(
+            frames, dtype_backend=dtype_backend, int_ids=int_ids
+        )
+        return ids.to_frame().join(suppliers.set_index("molport_id"), on=column)
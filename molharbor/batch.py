@@ -0,0 +1,76 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Hashable, Iterable, Literal, Optional, TypeVar
+from molharbor.concurrency import AdaptiveLimiter
+
+Item = TypeVar("Item", bound=Hashable)
+Result = TypeVar("Result")
+Errors = Literal["raise", "ignore"]
+
+
+def limited(
+    func: Callable[[Item], Result], limiter: AdaptiveLimiter
+) -> Callable[[Item], Result]:
+    """Wrap `func` to hold a slot of `limiter` during every call
+
+    Args:
+        func (Callable[[Item], Result]): function to wrap
+        limiter (AdaptiveLimiter): limiter adjusted by latency and overload errors of the calls
+
+    Returns:
+        Callable[[Item], Result]: limited function
+    """
+
+    def wrapper(item: Item) -> Result:
+        with limiter.slot():
+            return func(item)
+
+    return wrapper
+
+
+def map_concurrent(
+    func: Callable[[Item], Result],
+    items: Iterable[Item],
+    max_workers: Optional[int] = None,
+    errors: Errors = "raise",
+    limiter: Optional[AdaptiveLimiter] = None,
+) -> Dict[Item, Result]:
+    """Apply `func` to unique `items` concurrently in a thread pool
+
+    Args:
+        func (Callable[[Item], Result]): function to apply, e.g. `Molport.find`
+        items (Iterable[Item]): inputs, duplicates are processed once
+        max_workers (Optional[int], optional): number of worker threads. Defaults to `limiter.max_limit` if limiter is given, otherwise 8.
+        errors (Errors, optional): "raise" to propagate the first exception, "ignore" to log and skip failed items. Defaults to "raise".
+        limiter (Optional[AdaptiveLimiter], optional): adaptive limit of concurrent calls, adjusted by observed latency and overload errors. Defaults to None, all workers run concurrently.
+
+    Returns:
+        Dict[Item, Result]: mapping of item to its result, in order of the input
+    """
+    unique = list(dict.fromkeys(items))
+    if max_workers is None:
+        max_workers = limiter.max_limit if limiter is not None else 8
+    if limiter is not None:
+        func = limited(func, limiter)
+    results: Dict[Item, Result] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # run every call in a copy of the caller context, e.g. to keep request priority
+        futures = {
+            executor.submit(contextvars.copy_context().run, func, item): item
+            for item in unique
+        }
+        try:
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    results[item] = future.result()
+                except Exception as e:
+                    if errors == "raise":
+                        raise
+                    logging.error(f"{item}: {e}")
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return {item: results[item] for item in unique if item in results}
@@ -0,0 +1,263 @@
+"""Per-query search time budgets learned from observed search durations.
+
+`SearchBudget` records the latency and result count of every search, grouped by search
+type and query features (SMILES length and ring count), and sets `maximum_search_time`
+of new searches to a percentile of the history of their group. Searches which used up
+their budget are flagged as outliers and could be retried later with a larger budget
+and low priority by `retry_outliers`.
+"""
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple, Union
+import numpy as np
+from molharbor.batch import Errors, map_concurrent
+from molharbor.enums import Priority, SearchType
+from molharbor.exceptions import UnknownSearchTypeException
+from molharbor.scheduler import request_priority
+
+if TYPE_CHECKING:
+    from molharbor.checker import Molport, MolportCompound
+
+# upper edges of SMILES length and ring count groups
+LENGTH_BINS = np.array([20, 40, 80])
+RING_BINS = np.array([0, 1, 2, 4])
+Group = Tuple[SearchType, Optional[int], Optional[int]]
+
+
+def ring_count(smiles: str) -> int:
+    """Number of ring closures in SMILES, each closure label is used twice"""
+    labels = 0
+    bracket = False
+    i = 0
+    while i < len(smiles):
+        char = smiles[i]
+        if char == "[":
+            bracket = True
+        elif char == "]":
+            bracket = False
+        elif not bracket and char == "%":
+            labels += 1
+            i += 2
+        elif not bracket and char.isdigit():
+            labels += 1
+        i += 1
+    return labels // 2
+
+
+def query_features(smiles: str) -> Tuple[int, int]:
+    """Length group and ring count group of SMILES"""
+    length = int(np.searchsorted(LENGTH_BINS, len(smiles)))
+    rings = int(np.searchsorted(RING_BINS, ring_count(smiles)))
+    return length, rings
+
+
+@dataclass(frozen=True)
+class Outlier:
+    """Search which used up its time budget"""
+
+    smiles: str
+    search_type: SearchType
+    similarity: float
+    elapsed: float
+    budget: int
+
+
+class _History:
+    """Ring buffer of the last `size` observations"""
+
+    __slots__ = ["latency", "results", "count"]
+
+    def __init__(self, size: int):
+        self.latency = np.empty(size, dtype=np.float64)
+        self.results = np.empty(size, dtype=np.int64)
+        self.count = 0
+
+    def add(self, latency: float, results: int) -> None:
+        position = self.count % len(self.latency)
+        self.latency[position] = latency
+        self.results[position] = results
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, len(self.latency))
+
+
+class SearchBudget:
+    """Adaptive `maximum_search_time` of each search from the history of similar searches.
+
+    The budget of a search is `percentile` of latencies of the same search type and
+    query features, multiplied by `margin`. Groups with fewer than `min_samples`
+    observations fall back to all searches of the same type, and without enough
+    history no budget is set (API default).
+
+    Args:
+        percentile (float, optional): percentile of the observed latencies, in range 0 - 100. Defaults to 95.0.
+        margin (float, optional): multiplier of the percentile. Defaults to 2.0.
+        min_time (int, optional): lower bound of the budget in milliseconds. Defaults to 1000.
+        max_time (Optional[int], optional): upper bound of the budget in milliseconds. Defaults to None.
+        min_samples (int, optional): observations required to estimate a budget. Defaults to 20.
+        history (int, optional): number of last observations kept per group. Defaults to 1000.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        margin: float = 2.0,
+        min_time: int = 1000,
+        max_time: Optional[int] = None,
+        min_samples: int = 20,
+        history: int = 1000,
+    ):
+        if not 0.0 <= percentile <= 100.0:
+            raise ValueError("percentile must be in range 0 - 100")
+        self.percentile = percentile
+        self.margin = margin
+        self.min_time = min_time
+        self.max_time = max_time
+        self.min_samples = min_samples
+        self.history = history
+        self._groups: Dict[Group, _History] = {}
+        self._outliers: Deque[Outlier] = deque()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(percentile={self.percentile}, margin={self.margin}, "
+            f"outliers={len(self._outliers)})"
+        )
+
+    @staticmethod
+    def _groups_of(smiles: str, search_type: Union[SearchType, int]) -> List[Group]:
+        try:
+            search_type = SearchType(search_type)
+        except ValueError:
+            raise UnknownSearchTypeException(search_type)
+        length, rings = query_features(smiles)
+        return [(search_type, length, rings), (search_type, None, None)]
+
+    def budget(self, smiles: str, search_type: Union[SearchType, int]) -> Optional[int]:
+        """Maximum search time of a search in milliseconds, None if history is too short"""
+        with self._lock:
+            for group in self._groups_of(smiles, search_type):
+                history = self._groups.get(group)
+                if history is not None and len(history) >= self.min_samples:
+                    latency = history.latency[: len(history)]
+                    break
+            else:
+                return None
+            value = np.percentile(latency, self.percentile) * self.margin * 1000
+        value = max(self.min_time, int(value))
+        if self.max_time is not None:
+            value = min(self.max_time, value)
+        return value
+
+    def record(
+        self,
+        smiles: str,
+        search_type: Union[SearchType, int],
+        elapsed: float,
+        results: int,
+        budget: Optional[int] = None,
+        similarity: float = 0.9,
+    ) -> bool:
+        """Record a completed search
+
+        Args:
+            smiles (str): SMILES of the query
+            search_type (Union[SearchType, int]): search type
+            elapsed (float): duration of the request in seconds
+            results (int): number of returned molecules
+            budget (Optional[int], optional): maximum search time of the request in milliseconds. Defaults to None.
+            similarity (float, optional): similarity threshold, kept for the retry of similarity searches. Defaults to 0.9.
+
+        Returns:
+            bool: True if the search used up its budget and was flagged as outlier
+        """
+        with self._lock:
+            for group in self._groups_of(smiles, search_type):
+                if group not in self._groups:
+                    self._groups[group] = _History(self.history)
+                self._groups[group].add(elapsed, results)
+            cut_off = budget is not None and elapsed * 1000 >= budget
+            if cut_off:
+                self._outliers.append(
+                    Outlier(
+                        smiles, SearchType(search_type), similarity, elapsed, budget
+                    )
+                )
+        if cut_off:
+            logging.info(
+                f"Search of {smiles} took {elapsed:.1f} s and used up its budget of "
+                f"{budget} ms, flagged for retry"
+            )
+        return cut_off
+
+    @property
+    def outliers(self) -> List[Outlier]:
+        return list(self._outliers)
+
+    def pop_outliers(self) -> List[Outlier]:
+        """Remove and return flagged searches"""
+        with self._lock:
+            outliers = list(self._outliers)
+            self._outliers.clear()
+        return outliers
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Observations, median and percentile latency (seconds) and mean result count per search type"""
+        with self._lock:
+            stats = {}
+            for (search_type, length, _), history in self._groups.items():
+                if length is not None or not len(history):
+                    continue
+                latency = history.latency[: len(history)]
+                stats[search_type.name] = {
+                    "count": history.count,
+                    "median": float(np.median(latency)),
+                    "percentile": float(np.percentile(latency, self.percentile)),
+                    "mean_results": float(history.results[: len(history)].mean()),
+                }
+            return stats
+
+
+def retry_outliers(
+    molport: "Molport",
+    budget: SearchBudget,
+    max_search_time: int = 300_000,
+    max_workers: Optional[int] = 2,
+    errors: Errors = "ignore",
+    priority: Priority = Priority.BULK,
+    **kwargs,
+) -> Dict[Outlier, List["MolportCompound"]]:
+    """Search flagged outliers again with a larger time budget and low priority
+
+    Args:
+        molport (Molport): logged in Molport client
+        budget (SearchBudget): budget with flagged outliers, they are removed from it
+        max_search_time (int, optional): maximum search time of retries in milliseconds. Defaults to 300_000.
+        max_workers (Optional[int], optional): number of concurrent retries. Defaults to 2.
+        errors (Errors, optional): "raise" or "ignore" (log) failed searches. Defaults to "ignore".
+        priority (Priority, optional): priority of the requests if the client has a scheduler. Defaults to Priority.BULK.
+        **kwargs: other arguments of `Molport.find`, e.g. `max_results`. Outliers are searched again even if `negative_cache` of the client contains them.
+
+    Returns:
+        Dict[Outlier, List[MolportCompound]]: hits of each retried search
+    """
+
+    def search(outlier: Outlier) -> List["MolportCompound"]:
+        return molport.find(
+            outlier.smiles,
+            search_type=outlier.search_type,
+            similarity=outlier.similarity,
+            max_search_time=max_search_time,
+            recheck=True,
+            **kwargs,
+        )
+
+    with request_priority(priority):
+        return map_concurrent(
+            search, budget.pop_outliers(), max_workers=max_workers, errors=errors
+        )
@@ -1,85 +1,190 @@
 from __future__ import annotations
 import pandas as pd
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 import logging
-from typing import List, Optional, Union
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+from molharbor import json_backend
+from molharbor.budget import SearchBudget
+from molharbor.credentials import QUOTA_EXCEEDED_MESSAGE, CredentialPool, Credentials
 from molharbor.data import Response, ResponseSupplier
-from molharbor.exceptions import LoginError
-from molharbor.enums import SearchType, ResultStatus
+from molharbor.exceptions import LoginError, MolportHTTPError
+from molharbor.ids import encode_id
+from molharbor.lazy import LazyModel
+from molharbor.negative import NegativeCache, search_key
+from molharbor.enums import Priority, SearchType, ResultStatus
+from molharbor.scheduler import (
+    PriorityScheduler,
+    ScheduledTransport,
+    current_priority,
+    request_priority,
+)
+from molharbor.schema import SUPPLIER_SCHEMA, DtypeBackend, cast_suppliers
+from molharbor.session import SessionPool
+from molharbor.similarity import SimilarityCache, SimilarityResult
+from molharbor.transport import HTTPTransport, Transport, response_time
 from molharbor.utils import compound_search_payload
 from pydantic import ValidationError
 import cloudscraper
 
+SEARCH_URL = "https://api.molport.com/api/chemical-search/search"
+MOLECULE_URL = "https://api.molport.com/api/molecule/load?molecule={}&{}"
+
+T = TypeVar("T")
+
 
 class Molport:
-    __slots__ = ["client", "_api_key", "_username", "_password"]
+    """Molport API client.
+
+    A single instance could be shared between threads: credentials are stored as an
+    immutable `Credentials` object which is replaced atomically on login, and every
+    request borrows its own HTTP session from a bounded `SessionPool`.
+
+    Args:
+        max_connections (int, optional): maximum number of concurrent requests (HTTP sessions). Defaults to 10.
+        transport (Optional[Transport], optional): transport performing the requests, e.g. `ReplayTransport` for offline tests. Defaults to `HTTPTransport` over a pool of `max_connections` sessions.
+        scheduler (Optional[PriorityScheduler], optional): scheduler ordering interactive and bulk requests over the shared budget. Defaults to None, requests are sent in arrival order.
+        similarity_cache (Optional[SimilarityCache], optional): cache of similarity search results, a stricter similarity search of a cached SMILES is answered without a request. Defaults to None.
+        negative_cache (Optional[NegativeCache], optional): filter of searches which returned no molecules, such searches are skipped by `find`. Defaults to None.
+        search_budget (Optional[SearchBudget], optional): history of search durations, sets `max_search_time` of searches without an explicit one. Defaults to None.
+    """
 
-    def __init__(self):
-        self.client = cloudscraper.create_scraper()
-        self._api_key = None
-        self._username = None
-        self._password = None
+    __slots__ = [
+        "_transport",
+        "_credentials",
+        "_pool",
+        "_lock",
+        "_similarity_cache",
+        "_negative_cache",
+        "_search_budget",
+    ]
+
+    def __init__(
+        self,
+        max_connections: int = 10,
+        transport: Optional[Transport] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        similarity_cache: Optional[SimilarityCache] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        search_budget: Optional[SearchBudget] = None,
+    ):
+        if transport is None:
+            sessions = SessionPool(cloudscraper.create_scraper, max_connections)
+            transport = HTTPTransport(sessions)
+        if scheduler is not None:
+            transport = ScheduledTransport(transport, scheduler)
+        self._transport = transport
+        self._credentials = Credentials()
+        self._pool: Optional[CredentialPool] = None
+        self._lock = threading.Lock()
+        self._similarity_cache = similarity_cache
+        self._negative_cache = negative_cache
+        self._search_budget = search_budget
 
     def __repr__(self) -> str:
         return type(self).__name__ + "()"
 
+    def close(self) -> None:
+        """Close the transport, e.g. HTTP sessions or the archive of `RecordingTransport`"""
+        self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def transport(self) -> Transport:
+        return self._transport
+
+    @property
+    def similarity_cache(self) -> Optional[SimilarityCache]:
+        return self._similarity_cache
+
+    @property
+    def negative_cache(self) -> Optional[NegativeCache]:
+        return self._negative_cache
+
+    @property
+    def search_budget(self) -> Optional[SearchBudget]:
+        return self._search_budget
+
+    @property
+    def pool(self) -> Optional[CredentialPool]:
+        """Credential pool used instead of own credentials, set by `login(pool=...)`"""
+        return self._pool
+
+    @property
+    def client(self):
+        """First HTTP session of the transport, not safe to use from several threads
+
+        None if the transport does not send requests, e.g. `ReplayTransport`.
+        """
+        return self._transport.client
+
     @property
     def credentials(self):
-        if self.api_key:
-            return {"api_key": self.api_key}
-        elif self.username and self.password:
-            return {"username": self.username, "password": self.password}
-        else:
-            raise LoginError(
-                "No credentials are provided. Please login with username and password or api_key using .login()"
-            )
+        return self._credentials.as_dict()
+
+    def _update_credentials(self, **changes) -> None:
+        with self._lock:
+            self._credentials = replace(self._credentials, **changes)
 
     @property
     def api_key(self):
-        return self._api_key
+        return self._credentials.api_key
 
     @api_key.setter
     def api_key(self, value):
-        self._api_key = value
-        print("API key is set and will be used as default for all requests")
-        self._username = None
-        self._password = None
+        self._credentials = Credentials(api_key=value)
+        logging.info("API key is set and will be used as default for all requests")
 
     @property
     def username(self):
-        return self._username
+        return self._credentials.username
 
     @username.setter
     def username(self, value):
-        self._username = value
+        self._update_credentials(username=value)
 
     @property
     def password(self):
-        return self._password
+        return self._credentials.password
 
     @password.setter
     def password(self, value):
-        self._password = value
+        self._update_credentials(password=value)
+
+    # kept for backward compatibility, credentials are stored in `_credentials`
+    _api_key = api_key
+    _username = username
+    _password = password
 
     def login(
         self,
         username: Optional[str] = None,
         password: Optional[str] = None,
         api_key: Optional[str] = None,
+        pool: Optional[CredentialPool] = None,
     ):
         """
         Login to Molport API. If api_key is provided, it will be used as default for all requests.
+        If pool is provided, requests are spread across its credentials.
         """
+        if pool is not None:
+            if any([username, password, api_key]):
+                raise LoginError("Please provide either credentials or pool")
+            self._pool = pool
+            return
+        self._pool = None
         if all([username, password, api_key]):
             raise LoginError("Please provide either username and password or api_key")
         elif api_key:
-            self._api_key = api_key
-            self._username = None
-            self._password = None
+            self._credentials = Credentials(api_key=api_key)
         elif username and password:
-            self._username = username
-            self._password = password
-            self._api_key = None
+            self._credentials = Credentials(username=username, password=password)
         else:
             raise LoginError(
                 "Please provide either username and password or api_key to login"
@@ -95,16 +200,20 @@ class Molport:
         max_results: int = 10000,
         similarity: float = 0.9,
         return_response: bool = False,
+        priority: Optional[Priority] = None,
+        recheck: bool = False,
     ) -> List[MolportCompound] | Response:
         """Find compounds by SMILES string in Molport database, have the same default values as the API
 
         Args:
             smiles (str): SMILES string of the compound
             search_type (Union[SearchType, int], optional): _description_. Defaults to SearchType.EXACT_FRAGMENT.
-            max_search_time (Optional[int], optional): time in miliseconds - maximum search time to be spent on chemical search
+            max_search_time (Optional[int], optional): time in miliseconds - maximum search time to be spent on chemical search. Defaults to the budget of `search_budget` if the client has one.
             max_results (int, optional): maximum result count which must be returned as result; currently maximum allowed value is 10000. Defaults to 10000.
             similarity (float, optional): if similarity search is made, it is possible to provide similarity index in range 0 - 1. Defaults to 0.9.
             return_response (bool, optional): If True, returns the response object. Otherwise parses the response and returns a list of `MolportCompound` objects. Defaults to False.
+            priority (Optional[Priority], optional): priority of the request if the client has a scheduler. Defaults to priority of the current context (INTERACTIVE).
+            recheck (bool, optional): If True, searches known to return no molecules (`negative_cache`) or cached similarity searches are sent again. Defaults to False.
 
         Raises:
             TypeError: If SMILES is not a string
@@ -116,80 +225,297 @@ class Molport:
         """
         if not isinstance(smiles, str):
             raise TypeError("SMILES must be a string")
+        if (
+            self._negative_cache is not None
+            and not (recheck or return_response)
+            and search_key(smiles, search_type, similarity) in self._negative_cache
+        ):
+            return []
+        if (
+            self._similarity_cache is not None
+            and not (recheck or return_response)
+            and search_type in (SearchType.SIMILARITY, SearchType.SIMILARITY.value)
+        ):
+            result = self._similarity_result(
+                smiles, similarity, max_search_time, max_results, priority
+            )
+            hits = result.filter(similarity)[:max_results]
+            return [MolportCompound(s, i) for s, i in hits]
+        response, _ = self._search_response(
+            smiles, search_type, max_search_time, max_results, similarity, priority
+        )
+        if response is None:
+            return []
+        if return_response:
+            return response
+        mols = response.data.molecules
+        if not mols:
+            return []
+        return [MolportCompound(mol.smiles, mol.molport_id) for mol in mols]
+
+    def _search_response(
+        self,
+        smiles: str,
+        search_type: Union[SearchType, int],
+        max_search_time: Optional[int],
+        max_results: int,
+        similarity: float,
+        priority: Optional[Priority],
+    ) -> Tuple[Optional[Response], bool]:
+        """Search with the time budget and record the outcome in the budget and negative cache
+
+        Returns:
+            Tuple[Optional[Response], bool]: response (None if the search failed) and whether the search used up its time limit, so hits may be missing
+        """
+        budget = None
+        if self._search_budget is not None and max_search_time is None:
+            budget = max_search_time = self._search_budget.budget(smiles, search_type)
+        response, elapsed = self._with_credentials(
+            self._search,
+            smiles,
+            search_type,
+            max_search_time,
+            max_results,
+            similarity,
+            priority,
+        )
+        if response is None:
+            return None, False
+        time_limited = max_search_time is not None and elapsed * 1000 >= max_search_time
+        if self._search_budget is not None:
+            self._search_budget.record(
+                smiles,
+                search_type,
+                elapsed,
+                len(response.data.molecules or []),
+                budget=budget,
+                similarity=similarity,
+            )
+        if self._negative_cache is not None:
+            key = search_key(smiles, search_type, similarity)
+            if response.data.molecules:
+                self._negative_cache.discard(key)
+            elif not time_limited:
+                # a search cut off by its time limit is not a known miss
+                self._negative_cache.add(key)
+        return response, time_limited
+
+    def _with_credentials(self, func: Callable[..., T], *args) -> T:
+        """Call `func(credentials, *args)` with own credentials or a key of the pool
+
+        Requests rejected due to exceeded quota are retried with other keys of the pool,
+        at most once per key.
+        """
+        pool = self._pool
+        if pool is None:
+            return func(self._credentials, *args)
+        for attempt in range(len(pool)):
+            name, credentials = pool.acquire()
+            try:
+                result = func(credentials, *args)
+            except BaseException as e:
+                pool.release(name, e)
+                if pool.is_quota_error(e) and attempt + 1 < len(pool):
+                    continue
+                raise
+            pool.release(name)
+            return result
+
+    def _search(
+        self,
+        credentials: Credentials,
+        smiles: str,
+        search_type: Union[SearchType, int],
+        max_search_time: Optional[int],
+        max_results: int,
+        similarity: float,
+        priority: Optional[Priority],
+    ) -> Tuple[Optional[Response], float]:
+        """Send a search request
+
+        Returns:
+            Tuple[Optional[Response], float]: response (None if the search failed) and response time of the request in seconds
+        """
         payload = compound_search_payload(
             smiles=smiles,
             search_type=search_type,
             maximum_search_time=max_search_time,
             max_results=max_results,
             similarity=similarity,
-            credentials=self.credentials,
-        )
-        similarity_request = self.client.post(
-            "https://api.molport.com/api/chemical-search/search", json=payload
+            credentials=credentials.as_dict(),
         )
+        with request_priority(priority or current_priority()):
+            started = time.monotonic()
+            similarity_request = self._transport.post(
+                SEARCH_URL, data=json_backend.dumps(payload)
+            )
+            elapsed = response_time(similarity_request, time.monotonic() - started)
         if similarity_request.status_code != 200:
             similarity_request.raise_for_status()
         try:
-            response = Response(**similarity_request.json())
+            response = json_backend.parse_model(Response, similarity_request.content)
             if response.result.status != ResultStatus.SUCCESS.value:
                 msg = response.result.message
+                # keep the server message, only quota errors are retried by the pool
                 if (
                     "Username or password is incorrect!" in msg
-                    or "User is not recognized or allowed request count exceeded!"
-                    in msg
+                    or QUOTA_EXCEEDED_MESSAGE in msg
                 ):
-                    raise LoginError(
-                        "User is not recognized or allowed request count exceeded!"
-                    )
+                    raise LoginError(msg)
                 logging.error(msg)
-                return []
+                return None, elapsed
         except ValidationError as e:
             logging.error(e)
-            return []
-        if return_response:
-            return response
-        mols = response.data.molecules
-        if not mols:
-            return []
-        return [MolportCompound(mol.smiles, mol.molport_id) for mol in mols]
+            return None, elapsed
+        return response, elapsed
+
+    def _similarity_result(
+        self,
+        smiles: str,
+        threshold: float,
+        max_search_time: Optional[int],
+        max_results: int,
+        priority: Optional[Priority],
+    ) -> SimilarityResult:
+        cache = self._similarity_cache
+        result = cache.lookup(smiles, threshold) if cache is not None else None
+        if result is not None:
+            return result
+        response, time_limited = self._search_response(
+            smiles,
+            SearchType.SIMILARITY,
+            max_search_time,
+            max_results,
+            threshold,
+            priority,
+        )
+        if response is None:
+            # failed search is already logged by `_search` and is not cached
+            return SimilarityResult(threshold, [])
+        molecules = response.data.molecules or []
+        result = SimilarityResult(
+            threshold, molecules, truncated=len(molecules) >= max_results
+        )
+        # incomplete results would miss hits of later queries with other limits
+        if cache is not None and not (time_limited or result.truncated):
+            cache.store(smiles, result)
+        return result
+
+    def similarity_sweep(
+        self,
+        /,
+        smiles: str,
+        thresholds: Iterable[float],
+        *,
+        max_search_time: Optional[int] = None,
+        max_results: int = 10000,
+        priority: Optional[Priority] = None,
+    ) -> Dict[float, List[MolportCompound]]:
+        """Similarity search at several thresholds with a single request
+
+        The search is made once at the lowest threshold, hits of higher thresholds are
+        selected locally by their similarity index. With `similarity_cache` the result
+        is cached, and is reused by later calls of `find` or `similarity_sweep` with
+        the same SMILES and higher thresholds. Results cut off by the time limit or by
+        `max_results` are not cached.
+
+        Args:
+            smiles (str): SMILES string of the compound
+            thresholds (Iterable[float]): similarity thresholds in range 0 - 1
+            max_search_time (Optional[int], optional): time in miliseconds - maximum search time to be spent on chemical search
+            max_results (int, optional): maximum result count of the search at the lowest threshold. Defaults to 10000.
+            priority (Optional[Priority], optional): priority of the request if the client has a scheduler. Defaults to priority of the current context (INTERACTIVE).
+
+        Raises:
+            TypeError: If SMILES is not a string
+            ValueError: If no thresholds are given
+            LoginError: If credentials are incorrect
+
+        Returns:
+            Dict[float, List[MolportCompound]]: hits for each threshold, same as `find` with `similarity=threshold`
+        """
+        if not isinstance(smiles, str):
+            raise TypeError("SMILES must be a string")
+        thresholds = list(dict.fromkeys(thresholds))
+        if not thresholds:
+            raise ValueError("At least one threshold is required")
+        result = self._similarity_result(
+            smiles, min(thresholds), max_search_time, max_results, priority
+        )
+        return {
+            threshold: [
+                MolportCompound(s, i) for s, i in result.filter(threshold)[:max_results]
+            ]
+            for threshold in thresholds
+        }
 
     def get_suppliers(
-        self, molport_id: str, return_response: bool = False
-    ) -> Union[pd.DataFrame, ResponseSupplier]:
+        self,
+        molport_id: str,
+        return_response: bool = False,
+        dtype_backend: DtypeBackend = "numpy_nullable",
+        priority: Optional[Priority] = None,
+        lazy: bool = False,
+    ) -> Union[pd.DataFrame, ResponseSupplier, LazyModel[ResponseSupplier]]:
         """Get suppliers for a given Molport ID
 
         Args:
             molport_id (str): Molport ID of the compound
             return_response (bool, optional): If True, returns the response object. Otherwise parses the response and returns a DataFrame. Defaults to False.
+            dtype_backend (DtypeBackend, optional): dtype backend of the returned DataFrame, "numpy_nullable" or "pyarrow". Defaults to "numpy_nullable".
+            priority (Optional[Priority], optional): priority of the request if the client has a scheduler. Defaults to priority of the current context (INTERACTIVE).
+            lazy (bool, optional): If True, the response is validated on access of its fields, e.g. synonyms or unused supplier types are never validated. With `return_response` a `LazyModel` of `ResponseSupplier` is returned. Defaults to False.
 
         Raises:
-            ValueError: If the response status is not 200
+            MolportHTTPError: If the response status is not 200
 
         Returns:
-            Union[pd.DataFrame, ResponseSupplier]: DataFrame with supplier information or Response object
+            Union[pd.DataFrame, ResponseSupplier, LazyModel[ResponseSupplier]]: DataFrame with supplier information or Response object
         """
-        credentials = self.credentials
-        url = "https://api.molport.com/api/molecule/load?molecule={}"
-        if "api_key" in credentials:
-            url += "&apikey={}"
-            url = url.format(molport_id, credentials["api_key"])
-        else:
-            url += "&username={}&authenticationcode={}"
-            url = url.format(molport_id, self.username, self.password)
-        response = self.client.get(url)
-        if response.status_code != 200:
-            raise ValueError(f"Error code: {response.status_code}\n{response.text}")
-        data = ResponseSupplier(**response.json())
+        data = self._with_credentials(self._load_suppliers, molport_id, priority, lazy)
         if return_response:
             return data
         else:
-            return self.extract_suppliers(data)
+            return self.extract_suppliers(data, dtype_backend=dtype_backend)
 
-    def extract_suppliers(self, response: ResponseSupplier) -> pd.DataFrame:
+    def _load_suppliers(
+        self,
+        credentials: Credentials,
+        molport_id: str,
+        priority: Optional[Priority],
+        lazy: bool,
+    ) -> Union[ResponseSupplier, LazyModel[ResponseSupplier]]:
+        url = MOLECULE_URL.format(molport_id, credentials.query())
+        with request_priority(priority or current_priority()):
+            response = self._transport.get(url)
+        if response.status_code != 200:
+            raise MolportHTTPError(response.status_code, response.text)
+        if lazy:
+            data = LazyModel(ResponseSupplier, json_backend.loads(response.content))
+        else:
+            data = json_backend.parse_model(ResponseSupplier, response.content)
+        message = data.result.message
+        if (
+            data.result.status != ResultStatus.SUCCESS.value
+            and QUOTA_EXCEEDED_MESSAGE in message
+        ):
+            raise LoginError(message)
+        return data
+
+    def extract_suppliers(
+        self,
+        response: Union[ResponseSupplier, LazyModel[ResponseSupplier]],
+        dtype_backend: DtypeBackend = "numpy_nullable",
+    ) -> pd.DataFrame:
         """Extract suppliers from the response data
 
+        Returned DataFrame follows `molharbor.schema.SUPPLIER_SCHEMA`: strings with
+        few distinct values are categorical, ids and delivery days are nullable integers,
+        amounts and prices are float32 and `last_update_date_exact` is parsed to datetime.
+
         Args:
-            response (ResponseSupplier): Response data from the API
+            response (Union[ResponseSupplier, LazyModel[ResponseSupplier]]): Response data from the API
+            dtype_backend (DtypeBackend, optional): "numpy_nullable" or "pyarrow". Defaults to "numpy_nullable".
 
         Raises:
             ValueError: If the response status is not SUCCESS
@@ -206,20 +532,20 @@ class Molport:
         ]
         records = []
         for supp_type in types:
-            if hasattr(response.data.molecule.catalogues, supp_type):
-                for supp in response.data.molecule.catalogues.screening_block_suppliers:
-                    for catalog in supp.catalogues:
-                        data = catalog.model_dump()
-                        packings = data.pop("available_packings")
-                        name = {
-                            "supplier_name": supp.supplier_name,
-                            "supplier_type": supp_type,
-                        }
-                        for packing in packings:
-                            record = {**name, **packing, **data}
-                            records.append(record)
-        df = pd.DataFrame(records)
-        return df
+            suppliers = getattr(response.data.molecule.catalogues, supp_type, None)
+            for supp in suppliers or []:
+                for catalog in supp.catalogues:
+                    data = catalog.model_dump()
+                    packings = data.pop("available_packings")
+                    name = {
+                        "supplier_name": supp.supplier_name,
+                        "supplier_type": supp_type,
+                    }
+                    for packing in packings:
+                        record = {**name, **packing, **data}
+                        records.append(record)
+        df = pd.DataFrame.from_records(records, columns=list(SUPPLIER_SCHEMA))
+        return cast_suppliers(df, dtype_backend=dtype_backend)
 
 
 @dataclass
@@ -234,3 +560,8 @@ class MolportCompound:
             if self.molport_id
             else ""
         )
+
+    @property
+    def numeric_id(self) -> int:
+        """Molport ID as integer, e.g. "Molport-000-871-563" -> 871563"""
+        return encode_id(self.molport_id)
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import requests
+from cloudscraper.exceptions import CloudflareException
+from molharbor.credentials import QUOTA_EXCEEDED_MESSAGE
+from molharbor.exceptions import LoginError, MolportHTTPError
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """Check if an exception signals that the API is overloaded or throttling
+
+    HTTP 429 and 5xx responses, Cloudflare challenges and "allowed request count
+    exceeded" login errors are treated as overload.
+    """
+    if isinstance(exc, MolportHTTPError):
+        status = exc.status_code
+    elif isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+    elif isinstance(exc, LoginError):
+        return QUOTA_EXCEEDED_MESSAGE in str(exc)
+    else:
+        return isinstance(exc, (CloudflareException, requests.Timeout))
+    return status == 429 or status >= 500
+
+
+class AdaptiveLimiter:
+    """Adaptive concurrency limit using additive increase / multiplicative decrease (AIMD).
+
+    Every successful request completed faster than `latency_target` raises the limit
+    by `increase / limit` (so about `increase` per full window of requests). Overload
+    errors (see `is_overload_error`) and slow responses multiply the limit by
+    `decrease`. Only requests started after the previous decrease can decrease it again,
+    so a burst of failures of concurrently sent requests counts as a single event.
+
+    Args:
+        initial (int, optional): initial limit of in-flight requests. Defaults to 4.
+        min_limit (int, optional): lower bound of the limit. Defaults to 1.
+        max_limit (int, optional): upper bound of the limit. Defaults to 32.
+        increase (float, optional): additive increase per window of successful requests. Defaults to 1.0.
+        decrease (float, optional): multiplicative decrease factor, in range 0 - 1. Defaults to 0.5.
+        latency_target (Optional[float], optional): requests slower than this (seconds) are treated as overload. Defaults to None, latency is not considered.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_target: Optional[float] = None,
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError(
+                "Limits must satisfy 1 <= min_limit <= initial <= max_limit"
+            )
+        if not 0.0 < decrease < 1.0:
+            raise ValueError("decrease must be in range 0 - 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = float("-inf")
+        self._successes = 0
+        self._overloads = 0
+        self._condition = threading.Condition()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(limit={self.limit}, in_flight={self.in_flight}, "
+            f"min_limit={self.min_limit}, max_limit={self.max_limit})"
+        )
+
+    @property
+    def limit(self) -> int:
+        """Current maximum number of in-flight requests"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of limiter metrics"""
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "successes": self._successes,
+                "overloads": self._overloads,
+            }
+
+    def acquire(self) -> float:
+        """Wait for a free slot
+
+        Returns:
+            float: start time of the request, to be passed to `release`
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, overload: bool = False) -> None:
+        """Free a slot and adjust the limit
+
+        Args:
+            started (float): value returned by `acquire`
+            overload (bool, optional): whether the request failed due to overload. Defaults to False.
+        """
+        latency = time.monotonic() - started
+        if self.latency_target is not None and latency > self.latency_target:
+            overload = True
+        with self._condition:
+            self._in_flight -= 1
+            if overload:
+                self._overloads += 1
+                if started > self._last_decrease:
+                    self._last_decrease = time.monotonic()
+                    self._limit = max(self.min_limit, self._limit * self.decrease)
+                    logging.debug(f"Concurrency limit decreased to {self.limit}")
+            else:
+                self._successes += 1
+                self._limit = min(
+                    self.max_limit, self._limit + self.increase / self._limit
+                )
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold a slot for the duration of a request, overload errors reduce the limit"""
+        started = self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(started, overload=is_overload_error(e))
+            raise
+        self.release(started)
@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    Iterable,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+)
+from molharbor.exceptions import LoginError
+
+# part of the API message for exhausted quota
+QUOTA_EXCEEDED_MESSAGE = "request count exceeded"
+
+
+@dataclass(frozen=True)
+class Credentials:
+    """Immutable set of Molport credentials. If api_key is set, it takes precedence
+    over username and password.
+
+    Args:
+        api_key (Optional[str], optional): Molport API key. Defaults to None.
+        username (Optional[str], optional): Molport username. Defaults to None.
+        password (Optional[str], optional): Molport password. Defaults to None.
+    """
+
+    api_key: Optional[str] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+
+    def __repr__(self) -> str:
+        # never leak secrets to logs
+        kind = "api_key" if self.api_key else "username"
+        return f"{type(self).__name__}({kind}=***)"
+
+    def as_dict(self) -> Dict[str, str]:
+        """Credentials in the form expected by `compound_search_payload`
+
+        Raises:
+            LoginError: If neither api_key nor username and password are set
+
+        Returns:
+            Dict[str, str]: either {"api_key": ...} or {"username": ..., "password": ...}
+        """
+        if self.api_key:
+            return {"api_key": self.api_key}
+        elif self.username and self.password:
+            return {"username": self.username, "password": self.password}
+        else:
+            raise LoginError(
+                "No credentials are provided. Please login with username and password or api_key using .login()"
+            )
+
+    def query(self) -> str:
+        """Credentials as URL query parameters used by the molecule endpoint"""
+        credentials = self.as_dict()
+        if "api_key" in credentials:
+            return "apikey={}".format(credentials["api_key"])
+        return "username={}&authenticationcode={}".format(
+            credentials["username"], credentials["password"]
+        )
+
+
+Strategy = Literal["round_robin", "least_used"]
+
+
+@dataclass
+class _KeyState:
+    credentials: Credentials
+    requests: int = 0
+    errors: int = 0
+    quota_exceeded: int = 0
+    in_flight: int = 0
+    available_at: float = 0.0
+
+
+class CredentialPool:
+    """Pool of credentials with separate quotas, requests are spread across them.
+
+    Keys rejected with "allowed request count exceeded" are taken out of the pool for
+    `cooldown` seconds, `Molport` retries such requests with another key.
+
+    Args:
+        credentials (Union[Iterable[Credentials], Mapping[str, Credentials]]): credentials, names used in `stats` are mapping keys or positions
+        strategy (Strategy, optional): "round_robin" or "least_used" (fewest in-flight, then fewest total requests). Defaults to "round_robin".
+        cooldown (float, optional): seconds a key stays out of the pool after exceeding its quota. Defaults to 600.0.
+
+    Raises:
+        ValueError: If no credentials are given, strategy is unknown or cooldown is not positive
+    """
+
+    def __init__(
+        self,
+        credentials: Union[Iterable[Credentials], Mapping[str, Credentials]],
+        strategy: Strategy = "round_robin",
+        cooldown: float = 600.0,
+    ):
+        if not isinstance(credentials, Mapping):
+            credentials = {str(i): c for i, c in enumerate(credentials)}
+        if not credentials:
+            raise ValueError("At least one set of credentials is required")
+        if strategy not in get_args(Strategy):
+            raise ValueError(
+                f"Unknown strategy {strategy!r}, expected one of {get_args(Strategy)}"
+            )
+        if cooldown <= 0:
+            raise ValueError("cooldown must be positive")
+        for c in credentials.values():
+            # fail early on incomplete credentials
+            c.as_dict()
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self._keys = {name: _KeyState(c) for name, c in credentials.items()}
+        self._names = list(self._keys)
+        self._next = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(size={len(self)}, available={self.available}, "
+            f"strategy={self.strategy!r})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def available(self) -> int:
+        """Number of keys which are not cooling down"""
+        now = time.monotonic()
+        return sum(state.available_at <= now for state in self._keys.values())
+
+    def acquire(self) -> Tuple[str, Credentials]:
+        """Select credentials for the next request
+
+        Raises:
+            LoginError: If quota of every key is exceeded
+
+        Returns:
+            Tuple[str, Credentials]: name of the key, to be passed to `release`, and its credentials
+        """
+        now = time.monotonic()
+        with self._lock:
+            names = [n for n in self._names if self._keys[n].available_at <= now]
+            if not names:
+                retry = min(s.available_at for s in self._keys.values()) - now
+                raise LoginError(
+                    "Allowed request count exceeded for all credentials in the pool, "
+                    f"next key is available in {retry:.0f} s"
+                )
+            if self.strategy == "least_used":
+                name = min(
+                    names,
+                    key=lambda n: (self._keys[n].in_flight, self._keys[n].requests),
+                )
+            else:
+                count = len(self._names)
+                order = [self._names[(self._next + i) % count] for i in range(count)]
+                name = next(n for n in order if n in names)
+                self._next = (self._names.index(name) + 1) % count
+            state = self._keys[name]
+            state.requests += 1
+            state.in_flight += 1
+            return name, state.credentials
+
+    def release(self, name: str, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of a request made with key `name`
+
+        Args:
+            name (str): name returned by `acquire`
+            error (Optional[BaseException], optional): exception raised by the request. Defaults to None.
+        """
+        with self._lock:
+            state = self._keys[name]
+            state.in_flight -= 1
+            if error is None:
+                return
+            state.errors += 1
+            if self.is_quota_error(error):
+                state.quota_exceeded += 1
+                state.available_at = time.monotonic() + self.cooldown
+                logging.warning(
+                    f"Quota of credentials {name!r} is exceeded, "
+                    f"key is disabled for {self.cooldown:.0f} s"
+                )
+
+    @staticmethod
+    def is_quota_error(error: BaseException) -> bool:
+        return isinstance(error, LoginError) and QUOTA_EXCEEDED_MESSAGE in str(error)
+
+    def reset(self) -> None:
+        """Return all keys to the pool"""
+        with self._lock:
+            for state in self._keys.values():
+                state.available_at = 0.0
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Usage of every key, `requests_per_second` is averaged since creation of the pool"""
+        now = time.monotonic()
+        elapsed = max(now - self._started, 1e-9)
+        with self._lock:
+            return {
+                name: {
+                    "requests": state.requests,
+                    "errors": state.errors,
+                    "quota_exceeded": state.quota_exceeded,
+                    "in_flight": state.in_flight,
+                    "available": state.available_at <= now,
+                    "requests_per_second": state.requests / elapsed,
+                }
+                for name, state in self._keys.items()
+            }
+
+    def throughput(self) -> float:
+        """Requests per second across all keys since creation of the pool"""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        with self._lock:
+            return sum(s.requests for s in self._keys.values()) / elapsed
@@ -0,0 +1,204 @@
+"""Vectorized comparison of two runs of the same screen.
+
+Rows of both snapshots are identified by 64-bit hashes of their key columns, Molport
+IDs are converted to integers (`molharbor.ids`) and numbers are hashed without
+string conversion, at float32 precision so that float32 and float64 snapshots of the
+same values match. Added and removed rows are found with a hash set membership test
+and changed rows with a single join on the integer keys, without Python loops over
+hits or packings.
+"""
+
+from typing import List, Mapping, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from molharbor.checker import MolportCompound
+from molharbor.ids import decode_ids, encode_ids
+from molharbor.pricing import concat_suppliers
+
+PACKING_KEY = ["molport_id", "catalog_id", "amount", "measure_id"]
+PACKING_VALUES = ["price", "stock", "delivery_days"]
+# separates hashes of float32 values from hashes of integers
+FLOAT_TAG = np.uint64(0x9E3779B97F4A7C15)
+
+HitsLike = Union[pd.DataFrame, Mapping[str, List[MolportCompound]]]
+SuppliersLike = Union[pd.DataFrame, Mapping[Union[str, int], pd.DataFrame]]
+
+
+def _hits_frame(hits: HitsLike, query: str) -> pd.DataFrame:
+    if isinstance(hits, pd.DataFrame):
+        return hits
+    records = [(q, hit.molport_id) for q, found in hits.items() for hit in found]
+    return pd.DataFrame.from_records(records, columns=[query, "molport_id"])
+
+
+def _comparable_ids(old: pd.Series, new: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Molport IDs of both snapshots as integers, or as strings if some are invalid"""
+    encoded = [
+        ids if pd.api.types.is_integer_dtype(ids) else encode_ids(ids, errors="coerce")
+        for ids in (old, new)
+    ]
+    if all(ids.notna().all() for ids in encoded):
+        return encoded[0], encoded[1]
+    old, new = [
+        decode_ids(ids) if pd.api.types.is_integer_dtype(ids) else ids
+        for ids in (old, new)
+    ]
+    return old, new
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, spreads similar integers over all 64 bits"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _column_hash(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_integer_dtype(values) and not values.hasnans:
+        return _mix(values.to_numpy(dtype=np.int64).view(np.uint64))
+    if pd.api.types.is_numeric_dtype(values):
+        # integral values are hashed as integers and others at float32 precision, so
+        # the hash does not depend on the dtype of the snapshot (e.g. float32 schema
+        # and float64 read back from CSV)
+        floats = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        integral = np.isfinite(floats) & (floats == np.round(floats))
+        integral &= np.abs(floats) < 2.0**63
+        ints = np.where(integral, floats, 0.0).astype(np.int64).view(np.uint64)
+        singles = floats.astype(np.float32).view(np.uint32).astype(np.uint64)
+        return np.where(integral, _mix(ints), _mix(singles ^ FLOAT_TAG))
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def _keys(columns: Sequence[pd.Series]) -> np.ndarray:
+    """64-bit hash of every row"""
+    keys = np.zeros(len(columns[0]), dtype=np.uint64)
+    for values in columns:
+        keys = _mix(keys ^ _column_hash(values))
+    return keys
+
+
+def _isin(keys: np.ndarray, other: np.ndarray) -> np.ndarray:
+    """Membership test with a hash table, faster than `np.isin` for random 64-bit keys"""
+    return pd.Series(keys).isin(other).to_numpy()
+
+
+def diff_hits(old: HitsLike, new: HitsLike, query: str = "query") -> pd.DataFrame:
+    """Hits added and removed between two runs of the same searches
+
+    Args:
+        old (HitsLike): previous run, a DataFrame with `query` and `molport_id` columns (e.g. `df.molharbor.find` or `run_pipeline` output) or a mapping of query to `MolportCompound` lists
+        new (HitsLike): current run, in the same form
+        query (str, optional): column with queries, e.g. "smiles" for `df.molharbor.find` output. Defaults to "query".
+
+    Returns:
+        pd.DataFrame: `query`, `molport_id` and `change` ("added" or "removed") of each changed hit, rows of queries without hits are ignored
+    """
+    old = _hits_frame(old, query)
+    new = _hits_frame(new, query)
+    old = old.loc[old["molport_id"].notna(), [query, "molport_id"]]
+    new = new.loc[new["molport_id"].notna(), [query, "molport_id"]]
+    old_ids, new_ids = _comparable_ids(old["molport_id"], new["molport_id"])
+    old_keys = _keys([old[query], old_ids])
+    new_keys = _keys([new[query], new_ids])
+    removed = old[~_isin(old_keys, new_keys)].assign(change="removed")
+    added = new[~_isin(new_keys, old_keys)].assign(change="added")
+    result = pd.concat([added, removed], ignore_index=True)
+    result["change"] = pd.Categorical(result["change"], categories=["added", "removed"])
+    return result
+
+
+def _suppliers_frame(suppliers: SuppliersLike) -> pd.DataFrame:
+    if isinstance(suppliers, pd.DataFrame):
+        return suppliers
+    return concat_suppliers(suppliers)
+
+
+def _is_float32(values: pd.Series) -> bool:
+    return getattr(values.dtype, "numpy_dtype", values.dtype) == np.float32
+
+
+def _changed(old: pd.Series, new: pd.Series) -> np.ndarray:
+    """Element-wise inequality, missing values are equal to each other
+
+    If either column is float32, values are compared at float32 precision.
+    """
+    old_na = old.isna().to_numpy()
+    new_na = new.isna().to_numpy()
+    if pd.api.types.is_numeric_dtype(old) and pd.api.types.is_numeric_dtype(new):
+        single = _is_float32(old) or _is_float32(new)
+        old = old.to_numpy(dtype="float64", na_value=np.nan)
+        new = new.to_numpy(dtype="float64", na_value=np.nan)
+        equal = old == new
+        if single:
+            equal |= old.astype(np.float32) == new.astype(np.float32)
+    else:
+        old = old.astype(object).to_numpy()
+        new = new.astype(object).to_numpy()
+        old[old_na] = new[new_na] = None
+        equal = old == new
+    return ~(equal | (old_na & new_na))
+
+
+def diff_offers(
+    old: SuppliersLike,
+    new: SuppliersLike,
+    key: Sequence[str] = PACKING_KEY,
+    values: Sequence[str] = PACKING_VALUES,
+) -> pd.DataFrame:
+    """Supplier packings added, removed or changed between two snapshots
+
+    Args:
+        old (SuppliersLike): previous snapshot, a supplier table with `molport_id` column (e.g. `concat_suppliers` or `df.molharbor.suppliers` output) or a mapping of Molport ID to `get_suppliers` output
+        new (SuppliersLike): current snapshot, in the same form
+        key (Sequence[str], optional): columns identifying a packing. Defaults to molport_id, catalog_id, amount and measure_id.
+        values (Sequence[str], optional): compared columns. Defaults to price, stock and delivery_days.
+
+    Returns:
+        pd.DataFrame: `key` columns, `change` ("added", "removed" or "changed") and `<value>_old`, `<value>_new` for each compared column. Unchanged packings are omitted.
+    """
+    old = _suppliers_frame(old)
+    new = _suppliers_frame(new)
+    old = old.loc[old[list(key)].notna().all(axis=1), [*key, *values]]
+    new = new.loc[new[list(key)].notna().all(axis=1), [*key, *values]]
+    old_columns = [old[column] for column in key]
+    new_columns = [new[column] for column in key]
+    if "molport_id" in key:
+        position = list(key).index("molport_id")
+        old_columns[position], new_columns[position] = _comparable_ids(
+            old["molport_id"], new["molport_id"]
+        )
+    old = old.assign(_key=_keys(old_columns)).drop_duplicates("_key")
+    new = new.assign(_key=_keys(new_columns)).drop_duplicates("_key")
+
+    in_new = _isin(old["_key"].to_numpy(), new["_key"].to_numpy())
+    in_old = _isin(new["_key"].to_numpy(), old["_key"].to_numpy())
+    common = old[in_new].merge(
+        new.loc[in_old, ["_key", *values]], on="_key", suffixes=("_old", "_new")
+    )
+    mask = np.zeros(len(common), dtype=bool)
+    for column in values:
+        mask |= _changed(common[f"{column}_old"], common[f"{column}_new"])
+    changed = common[mask].assign(change="changed")
+
+    def side(df: pd.DataFrame, suffix: str, change: str) -> pd.DataFrame:
+        renamed = df.rename(columns={column: f"{column}_{suffix}" for column in values})
+        return renamed.assign(change=change)
+
+    result = pd.concat(
+        [
+            side(new[~in_old], "new", "added"),
+            side(old[~in_new], "old", "removed"),
+            changed,
+        ],
+        ignore_index=True,
+    )
+    columns = [*key, "change"]
+    for column in values:
+        columns += [f"{column}_old", f"{column}_new"]
+    result = result.reindex(columns=columns)
+    result["change"] = pd.Categorical(
+        result["change"], categories=["added", "removed", "changed"]
+    )
+    return result
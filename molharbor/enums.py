@@ -13,3 +13,8 @@ class SearchType(Enum):
     SIMILARITY = 4
     PERFECT = 5
     EXACT_FRAGMENT = 6
+
+
+class Priority(Enum):
+    INTERACTIVE = 1
+    BULK = 2
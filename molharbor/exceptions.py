@@ -16,3 +16,19 @@ class LoginError(Exception):
     """Exception raised when login fails."""
 
     pass
+
+
+class ReplayMissError(LookupError):
+    """Exception raised when a replayed request was not recorded in the archive."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        super().__init__(f"Request is not recorded in the archive: {key}")
+
+
+class MolportHTTPError(ValueError):
+    """Exception raised when Molport API responds with an unsuccessful status code."""
+
+    def __init__(self, status_code: int, text: str = "") -> None:
+        self.status_code = status_code
+        super().__init__(f"Error code: {status_code}\n{text}")
@@ -0,0 +1,105 @@
+"""Conversion between Molport ID strings and integers.
+
+Molport IDs have a fixed format `Molport-XXX-XXX-XXX`, the nine digits are the
+numeric id of the compound (`Molecule.id`), e.g. `Molport-000-871-563` <-> 871563.
+Integer ids take 8 bytes instead of ~70 bytes of a Python string, and joins,
+set operations and deduplication over them are plain integer operations.
+"""
+
+from typing import Literal, Union
+import numpy as np
+import pandas as pd
+
+PREFIX = b"molport-"
+ID_LENGTH = 19
+MAX_ID = 999_999_999
+# positions of digits in `Molport-XXX-XXX-XXX`
+_DIGITS = np.array([8, 9, 10, 12, 13, 14, 16, 17, 18])
+_POWERS = 10 ** np.arange(8, -1, -1, dtype=np.int64)
+_TEMPLATE = np.frombuffer(b"Molport-000-000-000", dtype=np.uint8)
+_PREFIX = np.frombuffer(PREFIX, dtype=np.uint8).astype(np.uint32)
+
+Errors = Literal["raise", "coerce"]
+IdsLike = Union[pd.Series, np.ndarray, list]
+
+
+def encode_id(molport_id: str) -> int:
+    """Convert Molport ID string to integer, e.g. "Molport-000-871-563" -> 871563"""
+    return int(encode_ids([molport_id])[0])
+
+
+def decode_id(value: int) -> str:
+    """Convert integer to Molport ID string, e.g. 871563 -> "Molport-000-871-563" """
+    return str(decode_ids([value])[0])
+
+
+def _encode(values: np.ndarray, errors: Errors) -> np.ndarray:
+    # one extra character to detect too long strings, which are truncated by numpy
+    fixed = values.astype(f"U{ID_LENGTH + 1}")
+    chars = fixed.view(np.uint32).reshape(len(fixed), ID_LENGTH + 1)
+    digits = chars[:, _DIGITS].astype(np.int64) - ord("0")
+    valid = (
+        (chars[:, ID_LENGTH - 1] != 0)
+        & (chars[:, ID_LENGTH] == 0)
+        # ASCII letters are lowercased by setting 0x20 bit, "-" already has it
+        & ((chars[:, : len(PREFIX)] | 0x20) == _PREFIX).all(axis=1)
+        & (chars[:, [7, 11, 15]] == ord("-")).all(axis=1)
+        & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    )
+    encoded = digits @ _POWERS
+    if not valid.all():
+        if errors == "raise":
+            invalid = values[~valid][0]
+            raise ValueError(f"Invalid Molport ID: {invalid!r}")
+        encoded[~valid] = -1
+    return encoded
+
+
+def encode_ids(
+    values: IdsLike, errors: Errors = "raise"
+) -> Union[np.ndarray, pd.Series]:
+    """Vectorized conversion of Molport ID strings to int64
+
+    Args:
+        values (IdsLike): Molport IDs as a Series, array or list
+        errors (Errors, optional): "raise" on invalid IDs, or "coerce" them to missing values (-1 for arrays). Defaults to "raise".
+
+    Raises:
+        ValueError: If an ID is invalid and errors="raise"
+
+    Returns:
+        Union[np.ndarray, pd.Series]: int64 array, or "Int64" Series with the same index for Series input
+    """
+    if isinstance(values, pd.Series):
+        mask = values.notna().to_numpy()
+        present = values[mask].to_numpy(dtype=object)
+        encoded = np.full(len(values), -1, dtype=np.int64)
+        encoded[mask] = _encode(present, errors)
+        result = pd.Series(encoded, index=values.index, name=values.name, dtype="Int64")
+        return result.mask(result == -1)
+    return _encode(np.asarray(values, dtype=object), errors)
+
+
+def decode_ids(values: IdsLike) -> Union[np.ndarray, pd.Series]:
+    """Vectorized conversion of integers to Molport ID strings
+
+    Args:
+        values (IdsLike): integer ids as a Series, array or list
+
+    Raises:
+        ValueError: If an id is out of range 0 - 999999999
+
+    Returns:
+        Union[np.ndarray, pd.Series]: array of strings, or Series with the same index for Series input (missing values are kept)
+    """
+    if isinstance(values, pd.Series):
+        mask = values.notna().to_numpy()
+        decoded = np.full(len(values), None, dtype=object)
+        decoded[mask] = decode_ids(values[mask].to_numpy(dtype=np.int64)).tolist()
+        return pd.Series(decoded, index=values.index, name=values.name)
+    ints = np.asarray(values, dtype=np.int64)
+    if ((ints < 0) | (ints > MAX_ID)).any():
+        raise ValueError(f"Molport ID integers must be in range 0 - {MAX_ID}")
+    chars = np.tile(_TEMPLATE, (len(ints), 1))
+    chars[:, _DIGITS] += ((ints[:, None] // _POWERS) % 10).astype(np.uint8)
+    return chars.view(f"S{ID_LENGTH}").ravel().astype(f"U{ID_LENGTH}")
@@ -0,0 +1,401 @@
+"""Batch jobs running in the background, which could be inspected and controlled.
+
+`BatchJob` applies a function to unique items with a fixed number of worker threads,
+with the same arguments and error handling as `molharbor.batch.map_concurrent`.
+Unlike `map_concurrent`, which submits all items to an executor at once, workers take
+the next item only when the job is running, so `pause` and `cancel` are cooperative:
+requests already sent are completed (drained) and their results are kept, and no new
+requests are started.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Iterable,
+    Optional,
+    TYPE_CHECKING,
+    Union,
+)
+from tqdm.auto import tqdm
+from molharbor.batch import Errors, Item, Result, limited
+from molharbor.concurrency import AdaptiveLimiter
+from molharbor.enums import Priority, SearchType
+from molharbor.scheduler import request_priority
+
+if TYPE_CHECKING:
+    from molharbor.checker import Molport
+
+
+class JobState(Enum):
+    RUNNING = "running"
+    PAUSED = "paused"
+    CANCELLED = "cancelled"
+    DONE = "done"
+
+
+class BatchJob(Generic[Item, Result]):
+    """Handle of a batch of calls running in background threads
+
+    Args:
+        func (Callable[[Item], Result]): function to apply, e.g. `Molport.find`
+        items (Iterable[Item]): inputs, duplicates are processed once
+        max_workers (Optional[int], optional): number of worker threads. Defaults to `limiter.max_limit` if limiter is given, otherwise 8.
+        errors (Errors, optional): "raise" to cancel the job on the first exception (re-raised by `wait`), "ignore" to log and skip failed items. Defaults to "raise".
+        limiter (Optional[AdaptiveLimiter], optional): adaptive limit of concurrent calls. Defaults to None.
+        progress (bool, optional): show a tqdm progress bar. Defaults to False.
+        window (float, optional): seconds over which `rate` is averaged. Defaults to 30.0.
+        description (Optional[str], optional): label of the progress bar. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[Item], Result],
+        items: Iterable[Item],
+        max_workers: Optional[int] = None,
+        errors: Errors = "raise",
+        limiter: Optional[AdaptiveLimiter] = None,
+        progress: bool = False,
+        window: float = 30.0,
+        description: Optional[str] = None,
+    ):
+        if max_workers is None:
+            max_workers = limiter.max_limit if limiter is not None else 8
+        self.func = limited(func, limiter) if limiter is not None else func
+        self.errors = errors
+        self.max_workers = max_workers
+        self.window = window
+        self._items = list(dict.fromkeys(items))
+        self._next = 0
+        self._results: Dict[Item, Result] = {}
+        self._failures: Dict[Item, BaseException] = {}
+        self._in_flight = 0
+        self._finished: Deque[float] = deque()
+        self._state = JobState.RUNNING
+        self._started: Optional[float] = None
+        self._threads = []
+        self._condition = threading.Condition()
+        self._bar = (
+            tqdm(total=len(self._items), desc=description, unit="req")
+            if progress
+            else None
+        )
+        self._bar_closed = False
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(state={self.state.value}, total={self.total}, "
+            f"completed={self.completed}, failed={self.failed}, pending={self.pending})"
+        )
+
+    def __enter__(self) -> "BatchJob[Item, Result]":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cancel()
+
+    def start(self) -> "BatchJob[Item, Result]":
+        """Start worker threads, each runs in a copy of the caller context"""
+        with self._condition:
+            if self._started is not None:
+                raise RuntimeError("Job is already started")
+            self._started = time.monotonic()
+        for _ in range(min(self.max_workers, len(self._items)) or 1):
+            context = contextvars.copy_context()
+            thread = threading.Thread(
+                target=context.run, args=(self._work,), daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _take(self) -> Optional[Item]:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._state != JobState.PAUSED or self._next >= len(self._items)
+            )
+            if self._state != JobState.RUNNING or self._next >= len(self._items):
+                return None
+            item = self._items[self._next]
+            self._next += 1
+            self._in_flight += 1
+            return item
+
+    def _work(self) -> None:
+        while True:
+            item = self._take()
+            if item is None:
+                break
+            try:
+                result = self.func(item)
+            except Exception as e:
+                self._complete(item, error=e)
+            else:
+                self._complete(item, result=result)
+        with self._condition:
+            finished = self._in_flight == 0 and self._next >= len(self._items)
+            if finished and self._state in (JobState.RUNNING, JobState.PAUSED):
+                self._state = JobState.DONE
+            if self._finished_locked():
+                self._close_bar_locked()
+            self._condition.notify_all()
+
+    def _complete(self, item: Item, result=None, error=None) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            self._finished.append(now)
+            while now - self._finished[0] > self.window:
+                self._finished.popleft()
+            if error is None:
+                self._results[item] = result
+            else:
+                self._failures[item] = error
+                if self.errors == "raise":
+                    self._state = JobState.CANCELLED
+                else:
+                    logging.error(f"{item}: {error}")
+            if self._bar is not None:
+                self._bar.update()
+                self._bar.set_postfix(failed=len(self._failures), refresh=False)
+            self._condition.notify_all()
+
+    def _close_bar_locked(self) -> None:
+        if self._bar is not None and not self._bar_closed:
+            self._bar_closed = True
+            self._bar.close()
+
+    @property
+    def state(self) -> JobState:
+        return self._state
+
+    @property
+    def total(self) -> int:
+        return len(self._items)
+
+    @property
+    def completed(self) -> int:
+        """Number of successful items"""
+        return len(self._results)
+
+    @property
+    def failed(self) -> int:
+        return len(self._failures)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def pending(self) -> int:
+        """Number of items not started yet"""
+        return len(self._items) - self._next
+
+    @property
+    def done(self) -> bool:
+        """Whether all items are processed or the job was cancelled and drained"""
+        with self._condition:
+            return self._finished_locked()
+
+    def _finished_locked(self) -> bool:
+        if self._state == JobState.DONE:
+            return True
+        return self._state == JobState.CANCELLED and self._in_flight == 0
+
+    @property
+    def rate(self) -> float:
+        """Completed items per second over the last `window` seconds"""
+        if self._started is None:
+            return 0.0
+        now = time.monotonic()
+        with self._condition:
+            while self._finished and now - self._finished[0] > self.window:
+                self._finished.popleft()
+            count = len(self._finished)
+        return count / max(min(self.window, now - self._started), 1e-9)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until all items are processed, None if unknown"""
+        rate = self.rate
+        remaining = self.pending + self.in_flight
+        if remaining == 0:
+            return 0.0
+        return remaining / rate if rate > 0 else None
+
+    @property
+    def results(self) -> Dict[Item, Result]:
+        """Results available so far, in order of the input"""
+        with self._condition:
+            return {
+                item: self._results[item]
+                for item in self._items
+                if item in self._results
+            }
+
+    @property
+    def failures(self) -> Dict[Item, BaseException]:
+        with self._condition:
+            return dict(self._failures)
+
+    def stats(self) -> Dict[str, Union[int, float, str, None]]:
+        """Snapshot of job progress"""
+        return {
+            "state": self.state.value,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "pending": self.pending,
+            "rate": self.rate,
+            "eta": self.eta,
+        }
+
+    def pause(self) -> None:
+        """Stop starting new items, in-flight items are completed"""
+        with self._condition:
+            if self._state == JobState.RUNNING:
+                self._state = JobState.PAUSED
+
+    def resume(self) -> None:
+        with self._condition:
+            if self._state == JobState.PAUSED:
+                self._state = JobState.RUNNING
+                self._condition.notify_all()
+
+    def cancel(self, wait: bool = True) -> None:
+        """Cancel not started items
+
+        Args:
+            wait (bool, optional): wait until in-flight items are completed. Defaults to True.
+        """
+        with self._condition:
+            if self._state in (JobState.RUNNING, JobState.PAUSED):
+                self._state = JobState.CANCELLED
+                self._condition.notify_all()
+        if wait:
+            self._join()
+
+    def _join(self, timeout: Optional[float] = None) -> bool:
+        with self._condition:
+            finished = self._condition.wait_for(self._finished_locked, timeout)
+            if finished:
+                # workers close the bar, unless the job was cancelled before start
+                self._close_bar_locked()
+        return finished
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[Item, Result]:
+        """Wait until the job is done or cancelled and drained
+
+        Args:
+            timeout (Optional[float], optional): maximum seconds to wait. Defaults to None.
+
+        Raises:
+            TimeoutError: If the job is not finished within timeout
+            Exception: First failure of the job if errors="raise"
+
+        Returns:
+            Dict[Item, Result]: results of successful items, in order of the input
+        """
+        if self._started is None:
+            self.start()
+        if not self._join(timeout):
+            raise TimeoutError(f"Job is not finished within {timeout} s")
+        if self.errors == "raise" and self._failures:
+            raise next(iter(self._failures.values()))
+        return self.results
+
+
+def find_job(
+    molport: "Molport",
+    smiles: Iterable[str],
+    *,
+    search_type: Union[SearchType, int] = SearchType.EXACT_FRAGMENT,
+    max_workers: Optional[int] = None,
+    errors: Errors = "ignore",
+    limiter: Optional[AdaptiveLimiter] = None,
+    priority: Priority = Priority.BULK,
+    progress: bool = False,
+    **kwargs,
+) -> BatchJob:
+    """Start a background job finding compounds for every SMILES
+
+    Args:
+        molport (Molport): logged in Molport client
+        smiles (Iterable[str]): queries, duplicates are searched once
+        search_type (Union[SearchType, int], optional): search type. Defaults to SearchType.EXACT_FRAGMENT.
+        max_workers (Optional[int], optional): number of worker threads. Defaults to 8, or `limiter.max_limit` if limiter is given.
+        errors (Errors, optional): "raise" or "ignore" failed queries. Defaults to "ignore".
+        limiter (Optional[AdaptiveLimiter], optional): adaptive limit of concurrent requests. Defaults to None.
+        priority (Priority, optional): priority of the requests if the client has a scheduler. Defaults to Priority.BULK.
+        progress (bool, optional): show a tqdm progress bar. Defaults to False.
+        **kwargs: other arguments of `Molport.find`, e.g. `max_results` or `similarity`
+
+    Returns:
+        BatchJob: running job, results map SMILES to lists of `MolportCompound`
+    """
+
+    def search(query: str):
+        return molport.find(query, search_type=search_type, **kwargs)
+
+    job = BatchJob(
+        search,
+        smiles,
+        max_workers=max_workers,
+        errors=errors,
+        limiter=limiter,
+        progress=progress,
+        description="find",
+    )
+    with request_priority(priority):
+        return job.start()
+
+
+def suppliers_job(
+    molport: "Molport",
+    molport_ids: Iterable[str],
+    *,
+    max_workers: Optional[int] = None,
+    errors: Errors = "ignore",
+    limiter: Optional[AdaptiveLimiter] = None,
+    priority: Priority = Priority.BULK,
+    progress: bool = False,
+    **kwargs,
+) -> BatchJob:
+    """Start a background job getting suppliers for every Molport ID
+
+    Args:
+        molport (Molport): logged in Molport client
+        molport_ids (Iterable[str]): Molport IDs, duplicates are requested once
+        max_workers (Optional[int], optional): number of worker threads. Defaults to 8, or `limiter.max_limit` if limiter is given.
+        errors (Errors, optional): "raise" or "ignore" failed requests. Defaults to "ignore".
+        limiter (Optional[AdaptiveLimiter], optional): adaptive limit of concurrent requests. Defaults to None.
+        priority (Priority, optional): priority of the requests if the client has a scheduler. Defaults to Priority.BULK.
+        progress (bool, optional): show a tqdm progress bar. Defaults to False.
+        **kwargs: other arguments of `Molport.get_suppliers`, e.g. `dtype_backend`
+
+    Returns:
+        BatchJob: running job, results map Molport IDs to supplier DataFrames (see `molharbor.pricing.concat_suppliers`)
+    """
+
+    def get_suppliers(molport_id: str):
+        return molport.get_suppliers(molport_id, **kwargs)
+
+    job = BatchJob(
+        get_suppliers,
+        molport_ids,
+        max_workers=max_workers,
+        errors=errors,
+        limiter=limiter,
+        progress=progress,
+        description="suppliers",
+    )
+    with request_priority(priority):
+        return job.start()
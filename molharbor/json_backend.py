@@ -0,0 +1,107 @@
+"""Pluggable JSON backend used for request encoding and response decoding.
+
+The fastest installed library is picked by default (orjson > msgspec > json).
+Responses are validated directly from bytes with pydantic's `model_validate_json`,
+which parses JSON in pydantic-core and skips building intermediate Python dicts.
+"""
+
+import json
+from typing import Any, Callable, Dict, Tuple, Type, TypeVar, Union
+from pydantic import BaseModel
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def _stdlib_backend() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    return dumps, json.loads
+
+
+def _orjson_backend() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    import orjson
+
+    return orjson.dumps, orjson.loads
+
+
+def _msgspec_backend() -> Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    import msgspec
+
+    encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+    return encoder.encode, decoder.decode
+
+
+_BACKENDS: Dict[str, Callable[[], Tuple[Callable, Callable]]] = {
+    "orjson": _orjson_backend,
+    "msgspec": _msgspec_backend,
+    "json": _stdlib_backend,
+}
+
+_backend_name: str = "json"
+_dumps, _loads = _stdlib_backend()
+
+
+def available_backends() -> Tuple[str, ...]:
+    """Names of JSON backends which could be imported, in order of preference"""
+    available = []
+    for name, factory in _BACKENDS.items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        available.append(name)
+    return tuple(available)
+
+
+def set_backend(name: str) -> None:
+    """Set JSON backend used by all `Molport` instances
+
+    Args:
+        name (str): one of "orjson", "msgspec" or "json"
+
+    Raises:
+        ValueError: If the backend is unknown
+        ImportError: If the backend library is not installed
+    """
+    global _backend_name, _dumps, _loads
+    if name not in _BACKENDS:
+        raise ValueError(
+            f"Unknown JSON backend: {name}. Expected one of: {list(_BACKENDS)}"
+        )
+    _dumps, _loads = _BACKENDS[name]()
+    _backend_name = name
+
+
+def get_backend() -> str:
+    """Name of the JSON backend currently in use"""
+    return _backend_name
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize object to JSON bytes with the current backend"""
+    return _dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize JSON bytes or string with the current backend"""
+    return _loads(data)
+
+
+def parse_model(model: Type[Model], content: Union[bytes, str]) -> Model:
+    """Validate raw JSON response body against a pydantic model
+
+    Args:
+        model (Type[Model]): pydantic model class, e.g. `Response`
+        content (Union[bytes, str]): raw response body
+
+    Raises:
+        ValidationError: If the body is not valid JSON or does not match the model
+
+    Returns:
+        Model: validated model instance
+    """
+    return model.model_validate_json(content)
+
+
+set_backend(available_backends()[0])
@@ -0,0 +1,160 @@
+"""Lazy validation of API responses.
+
+`LazyModel` keeps the raw decoded payload and validates a field only when it is
+accessed, nested models and lists of models are wrapped lazily as well, so reading
+e.g. building block suppliers of a `ResponseSupplier` does not validate screening
+suppliers, synonyms or shipment costs. Validated values are memoized.
+"""
+
+from collections.abc import Sequence
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    Mapping,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+from pydantic import BaseModel, ValidationError
+from pydantic.fields import FieldInfo
+
+M = TypeVar("M", bound=BaseModel)
+_MISSING = object()
+
+
+def _unwrap(annotation: Any) -> Any:
+    """Strip Optional from annotation"""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _validate_field(model: Type[BaseModel], name: str, value: Any) -> Any:
+    # validate a single field with the schema of the model
+    instance = model.model_construct()
+    model.__pydantic_validator__.validate_assignment(instance, name, value)
+    return getattr(instance, name)
+
+
+class LazyList(Sequence, Generic[M]):
+    """List of models, each item is validated on first access
+
+    Args:
+        model (Type[M]): model of the items
+        raw (List[Any]): raw items
+    """
+
+    __slots__ = ["_model", "_raw", "_items"]
+
+    def __init__(self, model: Type[M], raw: List[Any]):
+        self._model = model
+        self._raw = raw
+        self._items: List[Optional[M]] = [None] * len(raw)
+
+    def __repr__(self) -> str:
+        validated = sum(item is not None for item in self._items)
+        return (
+            f"{type(self).__name__}({self._model.__name__}, len={len(self)}, "
+            f"validated={validated})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if item is None:
+            item = self._model.model_validate(self._raw[index])
+            self._items[index] = item
+        return item
+
+
+class LazyModel(Generic[M]):
+    """Model validated field by field on first access
+
+    Attribute access mirrors the wrapped model. Nested models are returned as
+    `LazyModel` and lists of models as `LazyList`, other fields are validated with
+    the schema of the model.
+
+    Args:
+        model (Type[M]): pydantic model of the payload
+        raw (Mapping[str, Any]): raw decoded payload, keys are field aliases
+
+    Raises:
+        ValidationError: On access of an invalid or missing required field
+    """
+
+    __slots__ = ["_model", "_raw", "_values"]
+
+    def __init__(self, model: Type[M], raw: Mapping[str, Any]):
+        if not isinstance(raw, Mapping):
+            # raise the same error as eager validation
+            model.model_validate(raw)
+        self._model = model
+        self._raw = raw
+        self._values: Dict[str, Any] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}({self._model.__name__}, "
+            f"validated={list(self._values)})"
+        )
+
+    @property
+    def raw(self) -> Mapping[str, Any]:
+        return self._raw
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        field = self._model.model_fields.get(name)
+        if field is None:
+            raise AttributeError(
+                f"{self._model.__name__!r} object has no attribute {name!r}"
+            )
+        try:
+            return self._values[name]
+        except KeyError:
+            value = self._values[name] = self._load(name, field)
+            return value
+
+    def _load(self, name: str, field: FieldInfo) -> Any:
+        value = self._raw.get(field.alias or name, _MISSING)
+        if value is _MISSING:
+            if field.is_required():
+                raise ValidationError.from_exception_data(
+                    self._model.__name__,
+                    [
+                        {
+                            "type": "missing",
+                            "loc": (field.alias or name,),
+                            "input": self._raw,
+                        }
+                    ],
+                )
+            return field.get_default(call_default_factory=True)
+        annotation = _unwrap(field.annotation)
+        if _is_model(annotation) and isinstance(value, Mapping):
+            return LazyModel(annotation, value)
+        if get_origin(annotation) is list and isinstance(value, list):
+            (item,) = get_args(annotation)
+            if _is_model(item):
+                return LazyList(item, value)
+        return _validate_field(self._model, name, value)
+
+    def to_model(self) -> M:
+        """Validate the whole payload"""
+        return self._model.model_validate(self._raw)
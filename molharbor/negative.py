@@ -0,0 +1,225 @@
+"""Negative cache of searches which returned no molecules.
+
+`NegativeCache` is a Bloom filter split into time-ordered generations: new misses are
+added to the newest generation, generations older than `ttl` are dropped and so is the
+oldest generation when their number is exceeded. Every miss expires after at most
+`ttl` seconds or `capacity * generations` newer misses, so the memory use is bounded.
+A lookup is a few bit tests, without false negatives and with a configurable false
+positive rate.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Union
+import numpy as np
+from molharbor.enums import SearchType
+from molharbor.exceptions import UnknownSearchTypeException
+
+PathLike = Union[str, Path]
+
+
+def search_key(
+    smiles: str,
+    search_type: Union[SearchType, int],
+    similarity: Optional[float] = None,
+) -> bytes:
+    """128-bit digest identifying a search, similarity is used only for similarity searches"""
+    try:
+        search_type = SearchType(search_type)
+    except ValueError:
+        raise UnknownSearchTypeException(search_type)
+    key = f"{search_type.value}\0{smiles}"
+    if search_type == SearchType.SIMILARITY and similarity is not None:
+        key = f"{key}\0{similarity!r}"
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+class _Generation:
+    __slots__ = ["created", "count", "bits"]
+
+    def __init__(self, created: float, count: int, bits: np.ndarray):
+        self.created = created
+        self.count = count
+        self.bits = bits
+
+
+class NegativeCache:
+    """Bloom filter of searches which returned no molecules, with expiry.
+
+    Args:
+        capacity (int, optional): number of misses per generation, a full generation is replaced by a new one. Defaults to 1_000_000.
+        error_rate (float, optional): false positive rate of a lookup, i.e. the probability to skip a search which was never recorded as a miss. Defaults to 0.001.
+        ttl (Optional[float], optional): seconds after which a miss expires and is searched again, never expires if None. Defaults to 30 days.
+        generations (int, optional): maximum number of generations, misses expire between `ttl * (generations - 1) / generations` and `ttl` seconds, or are dropped with the oldest generation when a new one exceeds the number. Defaults to 4.
+
+    Raises:
+        ValueError: If parameters are out of range
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        ttl: Optional[float] = 30 * 24 * 3600.0,
+        generations: int = 4,
+    ):
+        if capacity < 1 or generations < 1:
+            raise ValueError("capacity and generations must be positive")
+        if not 0.0 < error_rate < 1.0:
+            raise ValueError("error_rate must be in range 0 - 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ttl = ttl
+        self.generations = generations
+        # every generation could give a false positive
+        rate = error_rate / generations
+        self.num_bits = math.ceil(-capacity * math.log(rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.hits = 0
+        self.misses = 0
+        self._generations: List[_Generation] = []
+        # searches which returned molecules after a forced re-check
+        self._found: Set[bytes] = set()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(size={len(self)}, capacity={self.capacity}, "
+            f"error_rate={self.error_rate}, ttl={self.ttl})"
+        )
+
+    def __len__(self) -> int:
+        """Approximate number of recorded misses which did not expire"""
+        self._expire(time.time())
+        return sum(g.count for g in self._generations)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(g.bits.nbytes for g in self._generations)
+
+    def _indices(self, digests: List[bytes]) -> np.ndarray:
+        # double hashing, k bit positions from two 64-bit halves of the digest
+        halves = np.frombuffer(b"".join(digests), dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (halves[:, :1] + steps * halves[:, 1:]) % np.uint64(self.num_bits)
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        with self._lock:
+            self._generations = [
+                g for g in self._generations if now - g.created < self.ttl
+            ]
+
+    def _current(self, now: float) -> _Generation:
+        span = self.ttl / self.generations if self.ttl is not None else math.inf
+        if (
+            not self._generations
+            or self._generations[-1].count >= self.capacity
+            or now - self._generations[-1].created >= span
+        ):
+            bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+            self._generations.append(_Generation(now, 0, bits))
+            del self._generations[: -self.generations]
+        return self._generations[-1]
+
+    def add(self, digest: bytes) -> None:
+        """Record a search without results, see `search_key`"""
+        index = self._indices([digest])[0]
+        now = time.time()
+        with self._lock:
+            generation = self._current(now)
+            np.bitwise_or.at(
+                generation.bits,
+                index >> np.uint64(3),
+                (1 << (index & np.uint64(7))).astype(np.uint8),
+            )
+            generation.count += 1
+            self._found.discard(digest)
+
+    def discard(self, digest: bytes) -> None:
+        """Forget a miss, e.g. when a re-check returned molecules"""
+        with self._lock:
+            if self._contains([digest])[0]:
+                self._found.add(digest)
+
+    def _contains(self, digests: List[bytes]) -> np.ndarray:
+        found = np.zeros(len(digests), dtype=bool)
+        if not digests or not self._generations:
+            return found
+        index = self._indices(digests)
+        byte, bit = index >> np.uint64(3), index & np.uint64(7)
+        for generation in self._generations:
+            found |= ((generation.bits[byte] >> bit) & 1).all(axis=1)
+        if self._found:
+            found &= np.array([d not in self._found for d in digests])
+        return found
+
+    def contains_many(self, digests: Iterable[bytes]) -> np.ndarray:
+        """Vectorized lookup of several searches
+
+        Returns:
+            np.ndarray: boolean array, True for searches known to return no molecules
+        """
+        self._expire(time.time())
+        with self._lock:
+            found = self._contains(list(digests))
+        hits = int(found.sum())
+        self.hits += hits
+        self.misses += len(found) - hits
+        return found
+
+    def __contains__(self, digest: bytes) -> bool:
+        return bool(self.contains_many([digest])[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations.clear()
+            self._found.clear()
+
+    def save(self, path: PathLike) -> None:
+        """Save the filter to a compressed numpy archive"""
+        with self._lock:
+            state = {
+                "params": np.array(
+                    [
+                        self.capacity,
+                        self.error_rate,
+                        np.nan if self.ttl is None else self.ttl,
+                        self.generations,
+                    ],
+                    dtype=np.float64,
+                ),
+                "created": np.array([g.created for g in self._generations]),
+                "counts": np.array([g.count for g in self._generations]),
+                "bits": np.array(
+                    [g.bits for g in self._generations], dtype=np.uint8
+                ).reshape(len(self._generations), (self.num_bits + 7) // 8),
+                "found": np.frombuffer(b"".join(sorted(self._found)), dtype=np.uint8),
+            }
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **state)
+
+    @classmethod
+    def load(cls, path: PathLike) -> "NegativeCache":
+        """Load a filter saved with `save`, expired generations are dropped"""
+        with np.load(path) as state:
+            capacity, error_rate, ttl, generations = state["params"].tolist()
+            cache = cls(
+                capacity=int(capacity),
+                error_rate=error_rate,
+                ttl=None if math.isnan(ttl) else ttl,
+                generations=int(generations),
+            )
+            cache._generations = [
+                _Generation(created, count, bits.copy())
+                for created, count, bits in zip(
+                    state["created"].tolist(), state["counts"].tolist(), state["bits"]
+                )
+            ]
+            cache._found = {row.tobytes() for row in state["found"].reshape(-1, 16)}
+        cache._expire(time.time())
+        return cache
@@ -0,0 +1,183 @@
+"""Pipeline overlapping compound search with supplier fetching.
+
+Search workers stream `MolportCompound` hits into a bounded queue, supplier workers
+consume it concurrently, so the network is busy in both stages and the total
+wall time approaches the time of the slower stage instead of the sum of both.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import pandas as pd
+from molharbor.batch import Errors
+from molharbor.checker import Molport, MolportCompound
+from molharbor.enums import Priority, SearchType
+from molharbor.scheduler import request_priority
+from molharbor.schema import cast_suppliers
+
+HIT_COLUMNS = ["query", "molport_id", "molport_smiles"]
+_DONE = None
+
+
+class _Writer:
+    """Collect combined rows in memory and optionally append them to a CSV file"""
+
+    def __init__(self, output: Optional[Union[str, Path]], keep_results: bool):
+        self.output = Path(output) if output is not None else None
+        self.keep_results = keep_results
+        self.frames: List[pd.DataFrame] = []
+        self.rows = 0
+        self._lock = threading.Lock()
+        if self.output is not None:
+            # truncate existing file, header is written with the first chunk
+            self.output.write_text("")
+
+    def write(self, hits: List[Tuple[str, MolportCompound]], suppliers: pd.DataFrame):
+        if suppliers.empty or not hits:
+            return
+        chunk = pd.concat(
+            [
+                suppliers.assign(
+                    query=query, molport_id=hit.molport_id, molport_smiles=hit.smiles
+                )
+                for query, hit in hits
+            ],
+            ignore_index=True,
+        )
+        chunk = chunk[[*HIT_COLUMNS, *suppliers.columns]]
+        with self._lock:
+            if self.output is not None:
+                chunk.to_csv(self.output, mode="a", header=self.rows == 0, index=False)
+            if self.keep_results:
+                self.frames.append(chunk)
+            self.rows += len(chunk)
+
+    def result(self) -> pd.DataFrame:
+        if self.frames:
+            df = pd.concat(self.frames, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=HIT_COLUMNS)
+        df = cast_suppliers(df)
+        return df[[*HIT_COLUMNS, *df.columns.drop(HIT_COLUMNS)]]
+
+
+def run_pipeline(
+    molport: Molport,
+    smiles: Iterable[str],
+    *,
+    search_type: Union[SearchType, int] = SearchType.EXACT_FRAGMENT,
+    top_n: Optional[int] = None,
+    search_workers: int = 4,
+    supplier_workers: int = 8,
+    queue_size: int = 256,
+    output: Optional[Union[str, Path]] = None,
+    keep_results: bool = True,
+    errors: Errors = "ignore",
+    priority: Priority = Priority.BULK,
+    **kwargs,
+) -> pd.DataFrame:
+    """Find compounds and fetch suppliers of every hit with both stages running concurrently
+
+    Suppliers of a compound found by several queries are fetched only once.
+
+    Args:
+        molport (Molport): logged in Molport client
+        smiles (Iterable[str]): queries, duplicates are searched once
+        search_type (Union[SearchType, int], optional): search type. Defaults to SearchType.EXACT_FRAGMENT.
+        top_n (Optional[int], optional): fetch suppliers only for the first N hits of each query. Defaults to None, all hits.
+        search_workers (int, optional): number of concurrent searches. Defaults to 4.
+        supplier_workers (int, optional): number of concurrent supplier requests. Defaults to 8.
+        queue_size (int, optional): maximum number of hits waiting for supplier fetching, searches are paused when the queue is full. Defaults to 256.
+        output (Optional[Union[str, Path]], optional): CSV file, combined rows are appended as soon as suppliers of a hit are fetched. Defaults to None.
+        keep_results (bool, optional): keep combined rows in memory and return them, disable for very large runs with `output`. Defaults to True.
+        errors (Errors, optional): "raise" or "ignore" (log) failed requests. Defaults to "ignore".
+        priority (Priority, optional): priority of the requests if the client has a scheduler. Defaults to Priority.BULK.
+        **kwargs: other arguments of `Molport.find`, e.g. `max_results` or `similarity`
+
+    Returns:
+        pd.DataFrame: `query`, `molport_id`, `molport_smiles` and supplier columns, one row per supplier packing of each hit
+    """
+    tasks: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=queue_size)
+    writer = _Writer(output, keep_results)
+    suppliers: Dict[str, pd.DataFrame] = {}
+    pending: Dict[str, List[Tuple[str, MolportCompound]]] = {}
+    state = threading.Lock()
+    failures: List[BaseException] = []
+    stop = threading.Event()
+
+    def fail(item: str, e: BaseException) -> None:
+        if errors == "raise":
+            failures.append(e)
+            stop.set()
+        else:
+            logging.error(f"{item}: {e}")
+
+    def search(query: str) -> None:
+        if stop.is_set():
+            return
+        try:
+            with request_priority(priority):
+                hits = molport.find(query, search_type=search_type, **kwargs)
+        except Exception as e:
+            fail(query, e)
+            return
+        for hit in hits[:top_n]:
+            with state:
+                if hit.molport_id in suppliers:
+                    ready = suppliers[hit.molport_id]
+                elif hit.molport_id in pending:
+                    pending[hit.molport_id].append((query, hit))
+                    continue
+                else:
+                    pending[hit.molport_id] = [(query, hit)]
+                    ready = None
+            if ready is not None:
+                writer.write([(query, hit)], ready)
+                continue
+            while not stop.is_set():
+                try:
+                    tasks.put(hit.molport_id, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def fetch() -> None:
+        while True:
+            molport_id = tasks.get()
+            if molport_id is _DONE:
+                return
+            if stop.is_set():
+                continue
+            try:
+                with request_priority(priority):
+                    frame = molport.get_suppliers(molport_id)
+            except Exception as e:
+                fail(molport_id, e)
+                frame = cast_suppliers(pd.DataFrame())
+            with state:
+                suppliers[molport_id] = frame
+                hits = pending.pop(molport_id, [])
+            writer.write(hits, frame)
+
+    consumers = [
+        threading.Thread(target=fetch, daemon=True) for _ in range(supplier_workers)
+    ]
+    for consumer in consumers:
+        consumer.start()
+    try:
+        with ThreadPoolExecutor(max_workers=search_workers) as executor:
+            list(executor.map(search, dict.fromkeys(smiles)))
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for _ in consumers:
+            tasks.put(_DONE)
+        for consumer in consumers:
+            consumer.join()
+    if failures:
+        raise failures[0]
+    return writer.result()
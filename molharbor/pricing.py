@@ -0,0 +1,207 @@
+from typing import Dict, Mapping, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from molharbor.ids import encode_ids
+from molharbor.schema import DtypeBackend, cast_suppliers
+
+# measure -> (dimension, factor to the base unit of the dimension)
+# base units: mass - mg, volume - mL, amount of substance - μmol
+UNITS: Dict[str, Tuple[str, float]] = {
+    "μg": ("mass", 1e-3),
+    "ug": ("mass", 1e-3),
+    "mg": ("mass", 1.0),
+    "g": ("mass", 1e3),
+    "kg": ("mass", 1e6),
+    "μL": ("volume", 1e-3),
+    "uL": ("volume", 1e-3),
+    "mL": ("volume", 1.0),
+    "ml": ("volume", 1.0),
+    "L": ("volume", 1e3),
+    "nmol": ("amount", 1e-3),
+    "μmol": ("amount", 1.0),
+    "umol": ("amount", 1.0),
+    "mmol": ("amount", 1e3),
+    "mol": ("amount", 1e6),
+}
+
+
+def concat_suppliers(
+    frames: Mapping[Union[str, int], pd.DataFrame],
+    dtype_backend: DtypeBackend = "numpy_nullable",
+    int_ids: bool = False,
+) -> pd.DataFrame:
+    """Merge supplier DataFrames of several compounds into one long table
+
+    Args:
+        frames (Mapping[Union[str, int], pd.DataFrame]): mapping of Molport ID (string or integer) to the output of `get_suppliers`
+        dtype_backend (DtypeBackend, optional): "numpy_nullable" or "pyarrow". Defaults to "numpy_nullable".
+        int_ids (bool, optional): store `molport_id` as integers (see `molharbor.ids`). Defaults to False.
+
+    Returns:
+        pd.DataFrame: supplier table with additional `molport_id` column
+    """
+    if not frames:
+        df = pd.DataFrame(columns=["molport_id"])
+    else:
+        df = pd.concat(frames, names=["molport_id", None]).reset_index(level=0)
+    df = cast_suppliers(df.reset_index(drop=True), dtype_backend=dtype_backend)
+    if int_ids and not pd.api.types.is_integer_dtype(df["molport_id"]):
+        df["molport_id"] = encode_ids(df["molport_id"].astype(object))
+    return df
+
+
+def _scale(measures: pd.Series, dimension: str) -> np.ndarray:
+    """Factor converting values in `measures` units to the base unit of `dimension`"""
+    factors = {unit: f for unit, (dim, f) in UNITS.items() if dim == dimension}
+    return (
+        measures.astype(object).map(factors).to_numpy(dtype="float64", na_value=np.nan)
+    )
+
+
+def _to_mg(
+    values: np.ndarray, measures: pd.Series, mw: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Mass in mg, amounts of substance are converted if molecular weight is known"""
+    mass = values * _scale(measures, "mass")
+    if mw is None:
+        return mass
+    # μmol * g/mol = μg
+    return np.where(
+        np.isnan(mass), values * _scale(measures, "amount") * mw / 1e3, mass
+    )
+
+
+def normalize_offers(
+    df: pd.DataFrame,
+    rates: Optional[Mapping[str, float]] = None,
+    currency: str = "USD",
+    molecular_weight: Optional[Union[pd.Series, Mapping[str, float]]] = None,
+) -> pd.DataFrame:
+    """Convert packing amounts, stock and prices of a supplier table to a common scale
+
+    Adds the following columns:
+        - `amount_mg`, `stock_mg` - mass in mg (μmol are converted if molecular weight is known)
+        - `amount_ml` - volume in mL
+        - `price_converted` - price in `currency`
+        - `price_per_mg`, `price_per_ml` - unit prices in `currency`
+
+    Values which could not be converted (unknown unit or currency, volumes to mass, μmol
+    without molecular weight) are NaN.
+
+    Args:
+        df (pd.DataFrame): output of `get_suppliers` or `concat_suppliers`
+        rates (Optional[Mapping[str, float]], optional): exchange rates, price in currency X is multiplied by `rates[X]`. Defaults to None, only `currency` prices are kept.
+        currency (str, optional): target currency. Defaults to "USD".
+        molecular_weight (Optional[Union[pd.Series, Mapping[str, float]]], optional): molecular weight (g/mol) per `molport_id`, used to convert μmol to mg. Defaults to None.
+
+    Returns:
+        pd.DataFrame: copy of the table with normalized columns
+    """
+    out = df.copy()
+    mw = None
+    if molecular_weight is not None and "molport_id" in out:
+        mw = out["molport_id"].astype(object).map(molecular_weight)
+        mw = mw.to_numpy(dtype="float64", na_value=np.nan)
+    amount = out["amount"].to_numpy(dtype="float64", na_value=np.nan)
+    out["amount_mg"] = _to_mg(amount, out["measure"], mw)
+    out["amount_ml"] = amount * _scale(out["measure"], "volume")
+    stock = out["stock"].to_numpy(dtype="float64", na_value=np.nan)
+    out["stock_mg"] = _to_mg(stock, out["stock_measure"], mw)
+
+    rates = {**(rates or {}), currency: 1.0}
+    rate = out["currency"].astype(object).map(rates)
+    price = out["price"].to_numpy(dtype="float64", na_value=np.nan)
+    out["price_converted"] = price * rate.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["price_per_mg"] = out["price_converted"] / out["amount_mg"]
+        out["price_per_ml"] = out["price_converted"] / out["amount_ml"]
+    return out
+
+
+def _stock_covers(offers: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Whether supplier stock covers each packing, and whether the two could be compared
+
+    Stock and packing amount are compared in mg, or in mL or μmol if both use them.
+    """
+    amount = offers["amount"].to_numpy(dtype="float64", na_value=np.nan)
+    stock = offers["stock"].to_numpy(dtype="float64", na_value=np.nan)
+    amounts = [offers["amount_mg"].to_numpy(dtype="float64", na_value=np.nan)]
+    stocks = [offers["stock_mg"].to_numpy(dtype="float64", na_value=np.nan)]
+    for dimension in ("volume", "amount"):
+        amounts.append(amount * _scale(offers["measure"], dimension))
+        stocks.append(stock * _scale(offers["stock_measure"], dimension))
+    amounts, stocks = np.stack(amounts), np.stack(stocks)
+    comparable = ~np.isnan(amounts) & ~np.isnan(stocks)
+    covered = comparable & (stocks >= amounts)
+    return covered.any(axis=0), comparable.any(axis=0)
+
+
+def best_offers(
+    offers: pd.DataFrame,
+    min_amount_mg: float = 0.0,
+    max_delivery_days: Optional[int] = None,
+    in_stock: bool = True,
+    by: str = "molport_id",
+) -> pd.DataFrame:
+    """Cheapest packing per compound which satisfies amount, delivery and stock constraints
+
+    Packings which could not be checked against the constraints (amount in mL or μmol
+    without molecular weight, stock in another unit than the packing) are kept, but
+    are selected only for compounds without a verified offer and have `verified` False.
+    Packings of suppliers which do not report stock are excluded if `in_stock`.
+
+    Args:
+        offers (pd.DataFrame): output of `normalize_offers`
+        min_amount_mg (float, optional): minimal packing size in mg. Defaults to 0.0.
+        max_delivery_days (Optional[int], optional): maximal delivery time. Defaults to None.
+        in_stock (bool, optional): keep only packings covered by the supplier stock. Defaults to True.
+        by (str, optional): column identifying the compound. Defaults to "molport_id".
+
+    Raises:
+        ValueError: If `offers` are not normalized
+
+    Returns:
+        pd.DataFrame: one row per compound with the cheapest offer and `verified` column, indexed by `by`
+    """
+    if "price_converted" not in offers:
+        raise ValueError("Offers are not normalized, use normalize_offers() first")
+    price = offers["price_converted"].to_numpy(dtype="float64", na_value=np.nan)
+    amount = offers["amount_mg"].to_numpy(dtype="float64", na_value=np.nan)
+    mask = ~np.isnan(price)
+    verified = (amount >= min_amount_mg) | (min_amount_mg <= 0)
+    mask &= verified | np.isnan(amount)
+    if max_delivery_days is not None:
+        delivery = offers["delivery_days"] <= max_delivery_days
+        mask &= delivery.to_numpy(dtype=bool, na_value=False)
+    if in_stock:
+        covered, comparable = _stock_covers(offers)
+        reported = offers["stock"].notna().to_numpy()
+        mask &= covered | (reported & ~comparable)
+        verified &= covered
+    best = offers.assign(verified=verified)[mask]
+    best = best.sort_values(
+        ["verified", "price_converted", "delivery_days"],
+        ascending=[False, True, True],
+        kind="stable",
+    )
+    best = best.drop_duplicates(subset=by, keep="first")
+    return best.set_index(by).sort_index()
+
+
+def supplier_coverage(offers: pd.DataFrame, by: str = "molport_id") -> pd.DataFrame:
+    """Number and fraction of compounds offered by each supplier
+
+    Args:
+        offers (pd.DataFrame): output of `concat_suppliers` or `normalize_offers`
+        by (str, optional): column identifying the compound. Defaults to "molport_id".
+
+    Returns:
+        pd.DataFrame: per supplier `compounds`, `packings`, `coverage` and, for normalized offers, `median_price_per_mg`, sorted by coverage
+    """
+    grouped = offers.groupby("supplier_name", observed=True)
+    stats = {"compounds": (by, "nunique"), "packings": (by, "size")}
+    if "price_per_mg" in offers:
+        stats["median_price_per_mg"] = ("price_per_mg", "median")
+    coverage = grouped.agg(**stats)
+    coverage.insert(2, "coverage", coverage["compounds"] / offers[by].nunique())
+    return coverage.sort_values("compounds", ascending=False)
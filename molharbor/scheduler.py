@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+import requests
+from molharbor.enums import Priority
+from molharbor.transport import Transport
+
+DEFAULT_WEIGHTS: Dict[Priority, float] = {
+    Priority.INTERACTIVE: 16.0,
+    Priority.BULK: 1.0,
+}
+
+_current_priority: ContextVar[Priority] = ContextVar(
+    "molharbor_priority", default=Priority.INTERACTIVE
+)
+
+
+def current_priority() -> Priority:
+    """Priority of requests sent from the current context"""
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(value: Priority) -> Iterator[None]:
+    """Send all requests inside the block with the given priority
+
+    Example:
+        >>> with request_priority(Priority.BULK):
+        ...     df.molharbor.find(molport, column="smiles")
+    """
+    token = _current_priority.set(Priority(value))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class PriorityScheduler:
+    """Weighted fair queuing of requests over a shared concurrency and rate budget.
+
+    Waiting requests are ordered by virtual finish time: a request of class `p`
+    gets tag `max(virtual_time, last_tag[p]) + 1 / weights[p]`. A request of a class
+    with a high weight (interactive) is therefore placed ahead of queued requests of
+    a low weight class (bulk), while the low weight class still receives about
+    `weights[bulk] / sum(weights)` of the budget when both are busy.
+
+    Args:
+        max_concurrency (int, optional): maximum number of in-flight requests. Defaults to 8.
+        weights (Optional[Mapping[Priority, float]], optional): weight of each priority class. Defaults to 16 for INTERACTIVE and 1 for BULK.
+        rate (Optional[float], optional): maximum requests per second (token bucket). Defaults to None, unlimited.
+        burst (Optional[int], optional): token bucket size. Defaults to `max_concurrency`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        weights: Optional[Mapping[Priority, float]] = None,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        if any(weight <= 0 for weight in weights.values()):
+            raise ValueError("weights must be positive")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_concurrency = max_concurrency
+        self.weights = weights
+        self.rate = rate
+        self.burst = burst if burst is not None else max_concurrency
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._virtual_time = 0.0
+        self._last_tag = {p: 0.0 for p in Priority}
+        self._queue: List[Tuple[float, int, Priority]] = []
+        self._counter = itertools.count()
+        self._in_flight = 0
+        self._dispatched = {p: 0 for p in Priority}
+        self._condition = threading.Condition()
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(max_concurrency={self.max_concurrency}, "
+            f"rate={self.rate}, in_flight={self._in_flight}, waiting={self.waiting})"
+        )
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queue)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of scheduler metrics"""
+        with self._condition:
+            stats = {"in_flight": self._in_flight, "waiting": len(self._queue)}
+            for p, count in self._dispatched.items():
+                stats[f"dispatched_{p.name.lower()}"] = count
+            return stats
+
+    def _take_token(self) -> float:
+        """Take a token from the bucket, returns time to wait if it is empty"""
+        if self.rate is None:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._refilled) * self.rate
+        )
+        self._refilled = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def acquire(self, priority: Optional[Priority] = None) -> None:
+        """Wait until the request is scheduled
+
+        Args:
+            priority (Optional[Priority], optional): priority class. Defaults to priority of the current context.
+        """
+        p = Priority(priority) if priority is not None else current_priority()
+        with self._condition:
+            tag = max(self._virtual_time, self._last_tag[p]) + 1.0 / self.weights[p]
+            self._last_tag[p] = tag
+            entry = (tag, next(self._counter), p)
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    if (
+                        self._queue[0] is entry
+                        and self._in_flight < self.max_concurrency
+                    ):
+                        delay = self._take_token()
+                        if delay == 0.0:
+                            break
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+            except BaseException:
+                # e.g. KeyboardInterrupt, a stale entry would block all later requests
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._queue)
+            self._virtual_time = tag
+            self._in_flight += 1
+            self._dispatched[p] += 1
+            self._condition.notify_all()
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority: Optional[Priority] = None) -> Iterator[None]:
+        """Hold a scheduled slot for the duration of a request"""
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class ScheduledTransport(Transport):
+    """Pass requests to another transport through a `PriorityScheduler`.
+
+    Priority is taken from the current context, see `request_priority`.
+
+    Args:
+        inner (Transport): transport performing the requests
+        scheduler (PriorityScheduler): scheduler shared by all requests
+    """
+
+    def __init__(self, inner: Transport, scheduler: PriorityScheduler):
+        self.inner = inner
+        self.scheduler = scheduler
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.inner!r}, {self.scheduler!r})"
+
+    @property
+    def client(self) -> Optional[requests.Session]:
+        return self.inner.client
+
+    def post(self, url: str, data: bytes):
+        with self.scheduler.slot():
+            return self.inner.post(url, data)
+
+    def get(self, url: str):
+        with self.scheduler.slot():
+            return self.inner.get(url)
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,123 @@
+from typing import Dict, Literal
+import pandas as pd
+
+DtypeBackend = Literal["numpy_nullable", "pyarrow"]
+
+# Output schema of the supplier DataFrame: column name -> logical type.
+# Logical types are mapped to concrete pandas dtypes per backend below.
+SUPPLIER_SCHEMA: Dict[str, str] = {
+    "supplier_name": "category",
+    "supplier_type": "category",
+    "amount": "float32",
+    "measure": "category",
+    "measure_id": "int32",
+    "price": "float32",
+    "currency": "category",
+    "currency_id": "int32",
+    "delivery_days": "int16",
+    "ship_by_air": "bool",
+    "catalog_id": "int64",
+    "catalog_number": "string",
+    "stock": "float32",
+    "stock_measure": "category",
+    "stock_measure_id": "int32",
+    "purity": "category",
+    "salt_data": "category",
+    "last_update_date": "category",
+    "last_update_date_exact": "datetime",
+}
+
+# Format of the `Last Update Date Exact` field, e.g. "Jul 8, 2025"
+LAST_UPDATE_DATE_FORMAT = "%b %d, %Y"
+
+_NUMPY_NULLABLE_DTYPES = {
+    "category": "category",
+    "string": "string",
+    "int16": "Int16",
+    "int32": "Int32",
+    "int64": "Int64",
+    "float32": "float32",
+    "bool": "boolean",
+    "datetime": "datetime64[ns]",
+}
+
+
+def _pyarrow_dtypes() -> Dict[str, pd.ArrowDtype]:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for dtype_backend='pyarrow'. "
+            "Install it with `pip install pyarrow`"
+        ) from e
+    return {
+        "category": pd.ArrowDtype(pa.dictionary(pa.int32(), pa.string())),
+        "string": pd.ArrowDtype(pa.string()),
+        "int16": pd.ArrowDtype(pa.int16()),
+        "int32": pd.ArrowDtype(pa.int32()),
+        "int64": pd.ArrowDtype(pa.int64()),
+        "float32": pd.ArrowDtype(pa.float32()),
+        "bool": pd.ArrowDtype(pa.bool_()),
+        "datetime": pd.ArrowDtype(pa.timestamp("ns")),
+    }
+
+
+def supplier_dtypes(
+    dtype_backend: DtypeBackend = "numpy_nullable",
+) -> Dict[str, object]:
+    """Concrete pandas dtypes of the supplier DataFrame for a given backend
+
+    Args:
+        dtype_backend (DtypeBackend, optional): "numpy_nullable" or "pyarrow". Defaults to "numpy_nullable".
+
+    Raises:
+        ValueError: If the backend is unknown
+        ImportError: If pyarrow backend is requested, but pyarrow is not installed
+
+    Returns:
+        Dict[str, object]: mapping of column name to pandas dtype
+    """
+    if dtype_backend == "numpy_nullable":
+        mapping = _NUMPY_NULLABLE_DTYPES
+    elif dtype_backend == "pyarrow":
+        mapping = _pyarrow_dtypes()
+    else:
+        raise ValueError(
+            f"Unknown dtype_backend: {dtype_backend}. Expected 'numpy_nullable' or 'pyarrow'"
+        )
+    return {col: mapping[kind] for col, kind in SUPPLIER_SCHEMA.items()}
+
+
+def cast_suppliers(
+    df: pd.DataFrame, dtype_backend: DtypeBackend = "numpy_nullable"
+) -> pd.DataFrame:
+    """Cast supplier DataFrame to the explicit supplier schema.
+
+    Missing columns are added as empty columns, so the result always has the same
+    columns in the same order. Could be also used to restore categorical dtypes
+    after concatenating several supplier tables.
+
+    Args:
+        df (pd.DataFrame): DataFrame with supplier information
+        dtype_backend (DtypeBackend, optional): "numpy_nullable" or "pyarrow". Defaults to "numpy_nullable".
+
+    Returns:
+        pd.DataFrame: DataFrame with supplier information and explicit dtypes
+    """
+    dtypes = supplier_dtypes(dtype_backend)
+    extra = [col for col in df.columns if col not in dtypes]
+    df = df.reindex(columns=[*dtypes, *extra])
+    columns = {}
+    for col, dtype in dtypes.items():
+        values, kind = df[col], SUPPLIER_SCHEMA[col]
+        if kind == "datetime" and not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(
+                values, format=LAST_UPDATE_DATE_FORMAT, errors="coerce"
+            )
+        elif kind == "category" and isinstance(values.dtype, pd.CategoricalDtype):
+            # re-encode to drop unused categories, e.g. after filtering or concat
+            values = values.astype(object)
+        columns[col] = values.astype(dtype)
+    for col in extra:
+        columns[col] = df[col]
+    return pd.DataFrame(columns, index=df.index)
@@ -0,0 +1,92 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+import cloudscraper
+import requests
+
+
+class SessionPool:
+    """Bounded pool of HTTP sessions which could be shared between threads.
+
+    `requests.Session` (and `cloudscraper.CloudScraper`) objects are not thread-safe,
+    so every request borrows a session for exclusive use and returns it afterwards.
+    Sessions are created lazily, and new sessions copy headers and cookies of the
+    first one. Cloudflare ties the clearance cookie to the User-Agent, so sharing both
+    avoids negotiating the clearance again for every session.
+
+    Args:
+        factory (Callable[[], requests.Session], optional): session constructor. Defaults to `cloudscraper.create_scraper`.
+        max_size (int, optional): maximum number of sessions, i.e. concurrent requests. Defaults to 10.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], requests.Session] = cloudscraper.create_scraper,
+        max_size: int = 10,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self.factory = factory
+        self.max_size = max_size
+        self._idle: "queue.LifoQueue[requests.Session]" = queue.LifoQueue()
+        self._sessions: List[requests.Session] = []
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={self.size}, max_size={self.max_size})"
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def size(self) -> int:
+        """Number of sessions created so far"""
+        return len(self._sessions)
+
+    @property
+    def seed(self) -> requests.Session:
+        """First session of the pool, its headers and cookies are copied to new sessions"""
+        with self._lock:
+            if not self._sessions:
+                self._sessions.append(self.factory())
+                self._idle.put(self._sessions[0])
+            return self._sessions[0]
+
+    def _get(self) -> requests.Session:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        seed: Optional[requests.Session] = None
+        with self._lock:
+            if self._sessions:
+                seed = self._sessions[0]
+            session = self.factory()
+            self._sessions.append(session)
+        if seed is not None:
+            session.headers.update(seed.headers)
+            session.cookies.update(seed.cookies)
+        return session
+
+    @contextmanager
+    def session(self) -> Iterator[requests.Session]:
+        """Borrow a session for exclusive use, blocks if all sessions are busy"""
+        self._slots.acquire()
+        try:
+            session = self._get()
+            try:
+                yield session
+            finally:
+                self._idle.put(session)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close all sessions of the pool"""
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+            self._idle = queue.LifoQueue()
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from molharbor.data import Molecule
+
+
+class SimilarityResult:
+    """Hits of a similarity search at `threshold`, which could answer any stricter threshold.
+
+    Similarity indices are kept in a sorted array, so filtering is a binary search.
+
+    Args:
+        threshold (float): similarity threshold of the search
+        molecules (List[Molecule]): molecules returned by the API
+        truncated (bool, optional): whether the API returned `max_results` molecules, so some hits may be missing. Defaults to False.
+    """
+
+    __slots__ = ["threshold", "truncated", "smiles", "molport_ids", "_order", "_sorted"]
+
+    def __init__(
+        self, threshold: float, molecules: List[Molecule], truncated: bool = False
+    ):
+        self.threshold = threshold
+        self.truncated = truncated
+        self.smiles = np.array([mol.smiles for mol in molecules], dtype=object)
+        self.molport_ids = np.array([mol.molport_id for mol in molecules], dtype=object)
+        similarity = np.array(
+            [mol.similarity_index for mol in molecules], dtype=np.float64
+        )
+        similarity = np.nan_to_num(similarity, nan=-np.inf)
+        # descending order, stable to keep the API order of ties
+        self._order = np.argsort(-similarity, kind="stable")
+        self._sorted = similarity[self._order]
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(threshold={self.threshold}, hits={len(self)}, "
+            f"truncated={self.truncated})"
+        )
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def covers(self, threshold: float) -> bool:
+        """Check if all hits at `threshold` are contained in this result
+
+        If the result was truncated at `max_results`, the API returns the most similar
+        molecules, so the result is still complete for thresholds above its lowest
+        similarity index.
+        """
+        if threshold < self.threshold:
+            return False
+        if not self.truncated:
+            return True
+        return len(self) > 0 and self._sorted[-1] < threshold
+
+    def filter(self, threshold: float) -> List[Tuple[str, str]]:
+        """Hits with similarity index >= threshold, in the API order
+
+        Returns:
+            List[Tuple[str, str]]: SMILES and Molport ID of each hit
+        """
+        count = np.searchsorted(-self._sorted, -threshold, side="right")
+        index = np.sort(self._order[:count])
+        return list(zip(self.smiles[index], self.molport_ids[index]))
+
+
+class SimilarityCache:
+    """LRU cache of similarity search results per SMILES.
+
+    A result of a search at threshold t answers later queries of the same SMILES at
+    any threshold >= t without a request.
+
+    Args:
+        maxsize (Optional[int], optional): maximum number of cached SMILES, unbounded if None. Defaults to 1024.
+    """
+
+    def __init__(self, maxsize: Optional[int] = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[str, SimilarityResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={len(self)}, maxsize={self.maxsize})"
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def lookup(self, smiles: str, threshold: float) -> Optional[SimilarityResult]:
+        """Cached result of `smiles` covering `threshold`, None on cache miss"""
+        with self._lock:
+            result = self._results.get(smiles)
+            if result is None or not result.covers(threshold):
+                self.misses += 1
+                return None
+            self._results.move_to_end(smiles)
+            self.hits += 1
+            return result
+
+    def store(self, smiles: str, result: SimilarityResult) -> None:
+        """Store result, an existing result with a lower threshold is kept"""
+        with self._lock:
+            current = self._results.get(smiles)
+            if current is not None and current.covers(result.threshold):
+                return
+            self._results[smiles] = result
+            self._results.move_to_end(smiles)
+            if self.maxsize is not None and len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,439 @@
+"""Transports perform HTTP requests on behalf of `Molport`.
+
+`HTTPTransport` talks to the Molport API, `RecordingTransport` additionally writes
+every exchange to an archive, `ReplayTransport` answers requests from such an archive
+without network access and `CachingTransport` keeps successful responses in memory
+(and could be warmed from an archive).
+"""
+
+import gzip
+from abc import ABC, abstractmethod
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from molharbor import json_backend
+from molharbor.enums import ResultStatus
+from molharbor.exceptions import ReplayMissError
+from molharbor.session import SessionPool
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+# credential fields in query strings (GET) and JSON payloads (POST)
+SECRET_PARAMS = ("apikey", "username", "authenticationcode")
+SECRET_FIELDS = ("API Key", "User Name", "Authentication Code")
+
+PathLike = Union[str, Path]
+Latency = Union[float, Tuple[float, float], str]
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in SECRET_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _redact_body(body: Optional[bytes]) -> Optional[str]:
+    if not body:
+        return None
+    payload = json_backend.loads(body)
+    if isinstance(payload, dict):
+        payload = {k: v for k, v in sorted(payload.items()) if k not in SECRET_FIELDS}
+    return json_backend.dumps(payload).decode()
+
+
+def request_key(method: str, url: str, data: Optional[bytes] = None) -> str:
+    """Key identifying a request independently of the credentials used
+
+    Args:
+        method (str): HTTP method, "GET" or "POST"
+        url (str): request URL
+        data (Optional[bytes], optional): JSON request body. Defaults to None.
+
+    Returns:
+        str: key used to match recorded and cached responses
+    """
+    body = _redact_body(data)
+    key = f"{method.upper()} {_redact_url(url)}"
+    return key if body is None else f"{key} {body}"
+
+
+def _is_success(content: bytes) -> bool:
+    """Check that the API reported success, errors such as exceeded quota are not cached"""
+    try:
+        payload = json_backend.loads(content)
+        return payload["Result"]["Status"] == ResultStatus.SUCCESS.value
+    except (ValueError, TypeError, KeyError):
+        return False
+
+
+def response_time(response, measured: float) -> float:
+    """Time between sending the request and receiving the response in seconds
+
+    `requests` and recorded responses report it as `elapsed`, which excludes time spent
+    waiting for a scheduler slot or a free session.
+
+    Args:
+        response: response returned by a transport
+        measured (float): fallback time measured by the caller in seconds
+
+    Returns:
+        float: response time in seconds
+    """
+    elapsed = getattr(response, "elapsed", None)
+    if isinstance(elapsed, timedelta):
+        return elapsed.total_seconds()
+    if isinstance(elapsed, (int, float)):
+        return float(elapsed)
+    return measured
+
+
+class RecordedResponse:
+    """Response restored from an archive or cache, mimics `requests.Response`
+
+    Args:
+        status_code (int): HTTP status code
+        content (bytes): raw response body
+        url (str, optional): request URL without credentials. Defaults to "".
+        elapsed (float, optional): original response time in seconds. Defaults to 0.0.
+    """
+
+    __slots__ = ["status_code", "content", "url", "elapsed"]
+
+    def __init__(
+        self, status_code: int, content: bytes, url: str = "", elapsed: float = 0.0
+    ):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+        self.elapsed = elapsed
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} [{self.status_code}]>"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json_backend.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+
+class Transport(ABC):
+    """Base class of all transports"""
+
+    @property
+    def client(self) -> Optional[requests.Session]:
+        """HTTP session used by the transport, None if it does not send requests"""
+        return None
+
+    @abstractmethod
+    def post(self, url: str, data: bytes):
+        """Send JSON encoded `data` with POST request"""
+
+    @abstractmethod
+    def get(self, url: str):
+        """Send GET request"""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HTTPTransport(Transport):
+    """Send requests to the Molport API using a pool of HTTP sessions
+
+    Args:
+        sessions (SessionPool): pool of HTTP sessions
+    """
+
+    def __init__(self, sessions: SessionPool):
+        self.sessions = sessions
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.sessions!r})"
+
+    @property
+    def client(self) -> requests.Session:
+        """First HTTP session of the pool, not safe to use from several threads"""
+        return self.sessions.seed
+
+    def post(self, url: str, data: bytes):
+        with self.sessions.session() as client:
+            return client.post(url, data=data, headers=JSON_HEADERS)
+
+    def get(self, url: str):
+        with self.sessions.session() as client:
+            return client.get(url)
+
+    def close(self) -> None:
+        self.sessions.close()
+
+
+def _open_archive(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _read_lines(path: Path) -> Iterator[str]:
+    """Complete lines of an archive, a tail truncated by a killed writer is skipped"""
+    with _open_archive(path, "r") as f:
+        try:
+            for line in f:
+                if line.endswith("\n"):
+                    yield line
+        except EOFError:
+            # the last gzip member was not written completely
+            return
+
+
+def read_archive(path: PathLike) -> Iterator[Tuple[str, RecordedResponse]]:
+    """Iterate over recorded exchanges of an archive
+
+    Args:
+        path (PathLike): JSON Lines archive, gzip-compressed if the name ends with .gz
+
+    Yields:
+        Tuple[str, RecordedResponse]: request key and recorded response
+    """
+    for line in _read_lines(Path(path)):
+        if not line.strip():
+            continue
+        record = json_backend.loads(line)
+        yield (
+            record["key"],
+            RecordedResponse(
+                record["status"],
+                record["content"].encode(),
+                record["url"],
+                record["elapsed"],
+            ),
+        )
+
+
+class RecordingTransport(Transport):
+    """Pass requests to another transport and append every exchange to an archive.
+
+    Credentials are stripped from recorded URLs and payloads. Every record of a
+    gzip-compressed archive is written as a complete gzip member, so the archive stays
+    readable if the process is killed before `close`.
+
+    Args:
+        inner (Transport): transport performing the requests
+        path (PathLike): JSON Lines archive, gzip-compressed if the name ends with .gz
+    """
+
+    def __init__(self, inner: Transport, path: PathLike):
+        self.inner = inner
+        self.path = Path(path)
+        self._file = open(self.path, "ab")
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.inner!r}, path='{self.path}')"
+
+    @property
+    def client(self) -> Optional[requests.Session]:
+        return self.inner.client
+
+    def _record(self, method: str, url: str, data: Optional[bytes], func, *args):
+        start = time.perf_counter()
+        response = func(*args)
+        record = {
+            "key": request_key(method, url, data),
+            "url": _redact_url(url),
+            "status": response.status_code,
+            "elapsed": time.perf_counter() - start,
+            "content": response.content.decode("utf-8", errors="replace"),
+        }
+        line = json_backend.dumps(record) + b"\n"
+        if self.path.suffix == ".gz":
+            line = gzip.compress(line)
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+        return response
+
+    def post(self, url: str, data: bytes):
+        return self._record("POST", url, data, self.inner.post, url, data)
+
+    def get(self, url: str):
+        return self._record("GET", url, None, self.inner.get, url)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        self.inner.close()
+
+
+class ReplayTransport(Transport):
+    """Answer requests from an archive written by `RecordingTransport`.
+
+    If the same request was recorded several times, responses are returned in the
+    recorded order, cycling when exhausted.
+
+    Args:
+        path (PathLike): archive to replay
+        latency (Latency, optional): artificial delay in seconds, either a constant, a (min, max) range or "recorded" to reproduce original response times. Defaults to 0.0.
+        error_rate (float, optional): fraction of requests answered with `error_status` instead of the recorded response. Defaults to 0.0.
+        error_status (int, optional): status code of injected errors. Defaults to 503.
+        seed (Optional[int], optional): seed of the random generator used for latency and errors. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        latency: Latency = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+    ):
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError("error_rate must be in range 0 - 1")
+        self.path = Path(path)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._responses: Dict[str, List[RecordedResponse]] = {}
+        self._calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for key, response in read_archive(self.path):
+            self._responses.setdefault(key, []).append(response)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(path='{self.path}', requests={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def _delay(self, response: RecordedResponse) -> float:
+        if self.latency == "recorded":
+            return response.elapsed
+        if isinstance(self.latency, tuple):
+            return self._random.uniform(*self.latency)
+        return float(self.latency)
+
+    def _replay(self, method: str, url: str, data: Optional[bytes] = None):
+        key = request_key(method, url, data)
+        with self._lock:
+            if key not in self._responses:
+                raise ReplayMissError(key)
+            responses = self._responses[key]
+            call = self._calls.get(key, 0)
+            self._calls[key] = call + 1
+            response = responses[call % len(responses)]
+            failed = self._random.random() < self.error_rate
+            delay = self._delay(response)
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            return RecordedResponse(
+                self.error_status, b"Injected replay error", response.url
+            )
+        return response
+
+    def post(self, url: str, data: bytes):
+        return self._replay("POST", url, data)
+
+    def get(self, url: str):
+        return self._replay("GET", url)
+
+
+class CachingTransport(Transport):
+    """Keep successful responses of another transport in an in-memory LRU cache.
+
+    Only responses with HTTP status 200 and successful API result are cached. Cached
+    responses keep the original response time as `elapsed`.
+
+    Args:
+        inner (Transport): transport performing the requests on cache misses
+        maxsize (Optional[int], optional): maximum number of cached responses, unbounded if None. Defaults to 10000.
+    """
+
+    def __init__(self, inner: Transport, maxsize: Optional[int] = 10000):
+        self.inner = inner
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, RecordedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.inner!r}, size={len(self)})"
+
+    @property
+    def client(self) -> Optional[requests.Session]:
+        return self.inner.client
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _store(self, key: str, response: RecordedResponse) -> None:
+        with self._lock:
+            self._cache[key] = response
+            self._cache.move_to_end(key)
+            if self.maxsize is not None and len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def warm(self, path: PathLike) -> int:
+        """Fill the cache with successful responses of an archive
+
+        Args:
+            path (PathLike): archive written by `RecordingTransport`
+
+        Returns:
+            int: number of cached responses
+        """
+        count = 0
+        for key, response in read_archive(path):
+            if response.status_code == 200 and _is_success(response.content):
+                self._store(key, response)
+                count += 1
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _cached(self, method: str, url: str, data: Optional[bytes], func, *args):
+        key = request_key(method, url, data)
+        with self._lock:
+            response = self._cache.get(key)
+            if response is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return response
+            self.misses += 1
+        start = time.perf_counter()
+        response = func(*args)
+        if response.status_code == 200 and _is_success(response.content):
+            elapsed = response_time(response, time.perf_counter() - start)
+            cached = RecordedResponse(200, response.content, _redact_url(url), elapsed)
+            self._store(key, cached)
+        return response
+
+    def post(self, url: str, data: bytes):
+        return self._cached("POST", url, data, self.inner.post, url, data)
+
+    def get(self, url: str):
+        return self._cached("GET", url, None, self.inner.get, url)
+
+    def close(self) -> None:
+        self.inner.close()
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+from molharbor.batch import map_concurrent
+from molharbor.enums import SearchType
+
+
+@pytest.fixture
+def mock_api(mock_api, bad_smiles_data):
+    mock_api.on_post = lambda p: bad_smiles_data if p["Structure"] == "VCX" else None
+    return mock_api
+
+
+def test_find(molport, mock_api):
+    df = pd.DataFrame(
+        {"smiles": ["C1=CC=CC=C1", "VCX", "C1=CC=CC=C1", None]},
+        index=pd.Index(["a", "b", "c", "d"], name="name"),
+    )
+    hits = df.molharbor.find(molport, search_type=SearchType.EXACT, max_workers=2)
+    assert sorted(mock_api.structures) == ["C1=CC=CC=C1", "VCX"]
+    assert list(hits.columns) == ["smiles", "molport_id", "molport_smiles", "link"]
+    assert hits.index.name == "name"
+    assert hits.loc["a"].shape[0] == 8
+    assert hits.loc["a"]["molport_id"].tolist() == hits.loc["c"]["molport_id"].tolist()
+    assert hits.loc[["b"], "molport_id"].isna().all()
+    assert "d" not in hits.index
+
+
+def test_find_int_ids(molport, mock_api):
+    df = pd.DataFrame({"smiles": ["C1=CC=CC=C1", "VCX"]})
+    hits = df.molharbor.find(molport, search_type=SearchType.EXACT, int_ids=True)
+    assert hits["molport_id"].dtype == "Int64"
+    assert "link" not in hits
+    suppliers = hits.dropna().iloc[:1].molharbor.suppliers(molport)
+    assert suppliers["molport_id"].dtype == "Int64"
+    assert any("Molport-" in url for url in mock_api.urls)
+
+
+def test_find_missing_column(molport):
+    with pytest.raises(KeyError):
+        pd.DataFrame({"smi": ["CCO"]}).molharbor.find(molport)
+
+
+def test_suppliers(molport, mock_api):
+    df = pd.DataFrame({"molport_id": ["Molport-002-325-020"] * 2}, index=[10, 20])
+    suppliers = df.molharbor.suppliers(molport)
+    assert len(mock_api) == 1
+    assert set(suppliers.index) == {10, 20}
+    assert len(suppliers.loc[10]) == len(suppliers) // 2
+    assert isinstance(suppliers["supplier_name"].dtype, pd.CategoricalDtype)
+
+
+def test_map_concurrent_deduplicates():
+    calls = []
+
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert map_concurrent(square, [3, 1, 3, 2]) == {3: 9, 1: 1, 2: 4}
+    assert sorted(calls) == [1, 2, 3]
+
+
+def test_map_concurrent_errors():
+    def fail(x):
+        if x == 2:
+            raise ValueError("failed")
+        return x
+
+    with pytest.raises(ValueError):
+        map_concurrent(fail, [1, 2, 3])
+    assert map_concurrent(fail, [1, 2, 3], errors="ignore") == {1: 1, 3: 3}
@@ -0,0 +1,168 @@
+import time
+import pytest
+from molharbor import Molport
+from molharbor.budget import SearchBudget, query_features, retry_outliers, ring_count
+from molharbor.enums import SearchType
+from molharbor.exceptions import UnknownSearchTypeException
+from molharbor.negative import NegativeCache, search_key
+from molharbor.transport import CachingTransport, RecordedResponse, Transport
+from .conftest import API_KEY, NO_RESULTS, SEARCH_10_EXACT_SUCCESS
+
+
+def slow_search(payload):
+    if payload["Structure"].startswith("slow"):
+        time.sleep(0.2)
+    if payload["Structure"] == "slow_miss":
+        # nothing found within a short time limit
+        if payload.get("Maximum Search Time", 0) < 1000:
+            return NO_RESULTS
+    return None
+
+
+@pytest.fixture
+def mock_api(mock_api):
+    mock_api.on_post = slow_search
+    return mock_api
+
+
+def test_ring_count():
+    assert ring_count("CCO") == 0
+    assert ring_count("c1ccccc1") == 1
+    assert ring_count("c1ccc2ccccc2c1") == 2
+    assert ring_count("C%10CCCCC%10") == 1
+    # digits in brackets are isotopes and charges
+    assert ring_count("[13CH4]") == 0
+    assert query_features("CCO") == (0, 0)
+    assert query_features("c1ccc2ccccc2c1" * 3) == (2, 4)
+
+
+def test_budget_from_history():
+    budget = SearchBudget(percentile=50, margin=2.0, min_time=10, min_samples=3)
+    assert budget.budget("CCO", SearchType.EXACT) is None
+    for elapsed in [0.1, 0.2, 0.3]:
+        budget.record("CCO", SearchType.EXACT, elapsed, 1)
+    assert budget.budget("CCN", SearchType.EXACT) == 400
+    assert budget.budget("CCN", SearchType.SUBSTRUCTURE) is None
+    # other features fall back to the history of the search type
+    for elapsed in [1.0, 1.0, 1.0]:
+        budget.record("c1ccccc1", SearchType.EXACT, elapsed, 5)
+    assert budget.budget("c1ccccc1", SearchType.EXACT) == 2000
+    assert budget.budget("CCC", SearchType.EXACT) == 400
+    assert budget.budget("C1CC1C1CC1", SearchType.EXACT) == 1300
+    stats = budget.stats()["EXACT"]
+    assert stats["count"] == 6
+    assert stats["mean_results"] == 3
+
+
+def test_budget_bounds():
+    budget = SearchBudget(min_time=500, max_time=1000, min_samples=1)
+    budget.record("CCO", 3, 0.01, 1)
+    assert budget.budget("CCO", 3) == 500
+    budget.record("CCO", 3, 100.0, 1)
+    assert budget.budget("CCO", 3) == 1000
+    with pytest.raises(UnknownSearchTypeException):
+        budget.budget("CCO", 10)
+
+
+def test_budget_history_size():
+    budget = SearchBudget(
+        percentile=100, margin=1.0, min_time=0, history=2, min_samples=1
+    )
+    for elapsed in [5.0, 0.1, 0.2]:
+        budget.record("CCO", 3, elapsed, 1)
+    assert budget.budget("CCO", 3) == 200
+
+
+def test_outliers():
+    budget = SearchBudget()
+    assert not budget.record("CCO", 3, 0.5, 1, budget=1000)
+    assert budget.record("CCO", 3, 1.2, 1, budget=1000, similarity=0.5)
+    (outlier,) = budget.outliers
+    assert outlier.smiles == "CCO"
+    assert outlier.search_type == SearchType.EXACT
+    assert outlier.budget == 1000
+    assert budget.pop_outliers() == [outlier]
+    assert budget.outliers == []
+
+
+def test_find_with_budget(mock_api):
+    molport = Molport(search_budget=SearchBudget())
+    molport.login(api_key=API_KEY)
+    molport.find("CCO", search_type=SearchType.EXACT)
+    # no history yet
+    assert "Maximum Search Time" not in mock_api.payloads[-1]
+    assert molport.search_budget.stats()["EXACT"]["count"] == 1
+
+    budget = SearchBudget(percentile=50, margin=2.0, min_time=1)
+    for _ in range(100):
+        budget.record("CCO", SearchType.EXACT, 0.01, 8)
+    molport = Molport(search_budget=budget)
+    molport.login(api_key=API_KEY)
+    molport.find("CCO", search_type=SearchType.EXACT)
+    assert mock_api.payloads[-1]["Maximum Search Time"] == 20
+    # explicit time is not overridden
+    molport.find("CCO", search_type=SearchType.EXACT, max_search_time=60000)
+    assert mock_api.payloads[-1]["Maximum Search Time"] == 60000
+    # slow search uses up the budget learned from fast ones
+    molport.find("slow", search_type=SearchType.EXACT)
+    assert "slow" in [o.smiles for o in budget.outliers]
+    assert budget.stats()["EXACT"]["count"] == 103
+
+    results = retry_outliers(molport, budget, max_search_time=120000)
+    assert all(len(hits) == 8 for hits in results.values())
+    assert mock_api.payloads[-1]["Maximum Search Time"] == 120000
+    assert budget.outliers == []
+
+
+def test_cut_off_search_is_not_a_known_miss(mock_api):
+    budget = SearchBudget(percentile=50, margin=2.0, min_time=1)
+    for _ in range(100):
+        budget.record("CCO", SearchType.EXACT, 0.01, 8)
+    molport = Molport(search_budget=budget, negative_cache=NegativeCache(1000))
+    molport.login(api_key=API_KEY)
+    assert molport.find("slow_miss", search_type=SearchType.EXACT) == []
+    assert "slow_miss" in [o.smiles for o in budget.outliers]
+    assert len(molport.negative_cache) == 0
+
+    # the cut off search is sent again with a larger budget, even if it is cached
+    molport.negative_cache.add(search_key("slow_miss", SearchType.EXACT))
+    results = retry_outliers(molport, budget, max_search_time=120000)
+    assert [len(hits) for hits in results.values()] == [8]
+    assert len(mock_api) == 2
+
+
+class DelayedTransport(Transport):
+    """Transport waiting before the request, like a busy scheduler or session pool"""
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def post(self, url: str, data: bytes):
+        time.sleep(0.1)
+        return RecordedResponse(200, self.content, elapsed=0.01)
+
+    def get(self, url: str):
+        raise NotImplementedError
+
+
+def test_budget_records_response_time():
+    with open(SEARCH_10_EXACT_SUCCESS, "rb") as f:
+        content = f.read()
+    molport = Molport(transport=DelayedTransport(content), search_budget=SearchBudget())
+    molport.login(api_key=API_KEY)
+    molport.find("CCO", search_type=SearchType.EXACT)
+    assert molport.search_budget.stats()["EXACT"]["median"] == pytest.approx(0.01)
+
+
+def test_cached_responses_keep_response_time():
+    with open(SEARCH_10_EXACT_SUCCESS, "rb") as f:
+        content = f.read()
+    transport = CachingTransport(DelayedTransport(content))
+    molport = Molport(transport=transport, search_budget=SearchBudget())
+    molport.login(api_key=API_KEY)
+    for _ in range(3):
+        molport.find("CCO", search_type=SearchType.EXACT)
+    assert transport.hits == 2
+    stats = molport.search_budget.stats()["EXACT"]
+    assert stats["count"] == 3
+    assert stats["median"] == pytest.approx(0.01)
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
 import pandas as pd
 from pydantic import ValidationError
 import pytest
@@ -8,6 +10,7 @@ from molharbor.enums import SearchType, ResultStatus
 from molharbor.exceptions import UnknownSearchTypeException
 from molharbor.data import ResponseSupplier, Response
 from molharbor.exceptions import LoginError
+from molharbor.schema import SUPPLIER_SCHEMA, cast_suppliers
 from .mock import MockResponse, MockResponseSupplier
 import json
 
@@ -404,3 +407,73 @@ def test_extract_suppliers(supplier_response, molport_obj: Molport):
             "last_update_date",
             "last_update_date_exact",
         ], f"Column {col} is not in the DataFrame"
+
+
+def test_extract_suppliers_dtypes(molport: Molport, supplier_response):
+    suppliers = molport.extract_suppliers(supplier_response)
+    assert list(suppliers.columns) == list(SUPPLIER_SCHEMA)
+    assert isinstance(suppliers["supplier_name"].dtype, pd.CategoricalDtype)
+    assert suppliers["price"].dtype == "float32"
+    assert suppliers["delivery_days"].dtype == "Int16"
+    assert suppliers["catalog_id"].dtype == "Int64"
+    assert pd.api.types.is_datetime64_any_dtype(suppliers["last_update_date_exact"])
+    assert suppliers["last_update_date_exact"].iloc[0] == pd.Timestamp("2025-07-08")
+
+
+def test_extract_suppliers_pyarrow(molport: Molport, supplier_response):
+    pytest.importorskip("pyarrow")
+    suppliers = molport.extract_suppliers(supplier_response, dtype_backend="pyarrow")
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in suppliers.dtypes)
+    numpy_suppliers = molport.extract_suppliers(supplier_response)
+    assert len(suppliers) == len(numpy_suppliers)
+
+
+def test_extract_suppliers_unknown_backend(molport: Molport, supplier_response):
+    with pytest.raises(ValueError):
+        molport.extract_suppliers(supplier_response, dtype_backend="polars")
+
+
+def test_cast_suppliers_after_concat(molport: Molport, supplier_response):
+    suppliers = molport.extract_suppliers(supplier_response)
+    merged = pd.concat([suppliers, suppliers.iloc[:0]], ignore_index=True)
+    merged["supplier_name"] = merged["supplier_name"].astype(object)
+    restored = cast_suppliers(merged)
+    assert isinstance(restored["supplier_name"].dtype, pd.CategoricalDtype)
+    assert len(restored) == len(suppliers)
+
+
+def test_credentials_snapshot(molport: Molport):
+    assert repr(molport._credentials) == "Credentials(username=***)"
+    with pytest.raises(FrozenInstanceError):
+        molport._credentials.username = "admin"
+    molport.login(api_key="880d8343-8ui2-418c-9g7a-68b4e2e78c8b")
+    assert molport.credentials == {"api_key": "880d8343-8ui2-418c-9g7a-68b4e2e78c8b"}
+    assert molport.username is None
+
+
+def test_api_setter_does_not_print(molport: Molport, capsys):
+    molport.api_key = "880d8343-8ui2-418c-9g7a-68b4e2e78c8b"
+    assert capsys.readouterr().out == ""
+
+
+def test_find_shared_between_threads(
+    molport: Molport, search_response: Response, monkeypatch: MonkeyPatch
+):
+    sessions = set()
+
+    def mock_post(self, *args, **kwargs):
+        sessions.add(id(self))
+        return MockResponse(200, search_response.model_dump(by_alias=True))
+
+    monkeypatch.setattr("cloudscraper.CloudScraper.post", mock_post)
+    molport = Molport(max_connections=4)
+    molport.login(username="john.spade", password="fasdga34a3")
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(
+            executor.map(
+                lambda smiles: molport.find(smiles, search_type=SearchType.EXACT),
+                ["C1=CC=CC=C1"] * 64,
+            )
+        )
+    assert all(len(result) == 8 for result in results)
+    assert 1 <= len(sessions) <= 4
@@ -0,0 +1,106 @@
+import threading
+import time
+import pytest
+import requests
+from molharbor.batch import map_concurrent
+from molharbor.concurrency import AdaptiveLimiter, is_overload_error
+from molharbor.exceptions import LoginError, MolportHTTPError
+from .mock import MockResponse
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (MolportHTTPError(429), True),
+        (MolportHTTPError(503), True),
+        (MolportHTTPError(404), False),
+        (requests.HTTPError(response=MockResponse(502, {})), True),
+        (requests.HTTPError(response=MockResponse(400, {})), False),
+        (
+            LoginError("User is not recognized or allowed request count exceeded!"),
+            True,
+        ),
+        (LoginError("No credentials are provided."), False),
+        (LoginError("Username or password is incorrect!"), False),
+        (requests.Timeout(), True),
+        (ValueError("bad smiles"), False),
+    ],
+)
+def test_is_overload_error(exc, expected):
+    assert is_overload_error(exc) is expected
+
+
+def test_additive_increase():
+    limiter = AdaptiveLimiter(initial=2, max_limit=4)
+    for _ in range(4):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 3
+    for _ in range(100):
+        limiter.release(limiter.acquire())
+    assert limiter.limit == 4
+
+
+def test_multiplicative_decrease():
+    limiter = AdaptiveLimiter(initial=16, max_limit=16)
+    with pytest.raises(MolportHTTPError):
+        with limiter.slot():
+            raise MolportHTTPError(429)
+    assert limiter.limit == 8
+    assert limiter.stats()["overloads"] == 1
+
+
+def test_concurrent_failures_decrease_once():
+    limiter = AdaptiveLimiter(initial=16, max_limit=16)
+    started = [limiter.acquire() for _ in range(8)]
+    for start in started:
+        limiter.release(start, overload=True)
+    assert limiter.limit == 8
+    limiter.release(limiter.acquire(), overload=True)
+    assert limiter.limit == 4
+
+
+def test_min_limit():
+    limiter = AdaptiveLimiter(initial=2, min_limit=2)
+    limiter.release(limiter.acquire(), overload=True)
+    assert limiter.limit == 2
+
+
+def test_slow_response_is_overload():
+    limiter = AdaptiveLimiter(initial=8, max_limit=8, latency_target=0.0)
+    with limiter.slot():
+        time.sleep(0.001)
+    assert limiter.limit == 4
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"initial": 0},
+        {"initial": 8, "max_limit": 4},
+        {"decrease": 1.0},
+    ],
+)
+def test_invalid_limits(kwargs):
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(**kwargs)
+
+
+def test_map_concurrent_respects_limit():
+    limiter = AdaptiveLimiter(initial=2, max_limit=2)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def work(x):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.005)
+        with lock:
+            active -= 1
+        return x
+
+    result = map_concurrent(work, range(20), max_workers=8, limiter=limiter)
+    assert len(result) == 20
+    assert peak <= 2
+    assert limiter.in_flight == 0
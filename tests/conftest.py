@@ -0,0 +1,128 @@
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from pytest import MonkeyPatch
+from molharbor import Molport
+from .mock import MockResponse
+
+SEARCH_10_EXACT_SUCCESS = "tests/data/search_10_results_exact.json"
+SUP_SEARCH_SUCCESS = "tests/data/suppliers_search.json"
+BAD_SMILES_RESPONSE = "tests/data/bad_smiles_search.json"
+API_KEY = "880d8343-8ui2-418c-9g7a-68b4e2e78c8b"
+NO_RESULTS = {
+    "Result": {"Status": 1, "Message": "Exact search completed!"},
+    "Data": {"Molecules": [], "Version": "v.3.0.2"},
+}
+
+Json = Dict[str, Any]
+
+
+def load_json(path: str) -> Json:
+    with open(path) as f:
+        return json.load(f)
+
+
+@dataclass
+class Call:
+    """Request received by `MockAPI`"""
+
+    method: str
+    url: str
+    payload: Optional[Json] = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        if self.payload is not None:
+            return self.payload.get("API Key")
+        return parse_qs(urlsplit(self.url).query).get("apikey", [None])[0]
+
+
+class MockAPI:
+    """Molport API patched into `cloudscraper`, every request is recorded in `calls`.
+
+    Searches are answered with `search` and molecule requests with `suppliers`, unless
+    `on_post` (called with the search payload) or `on_get` (called with the URL)
+    return another JSON body.
+    """
+
+    def __init__(self, search: Json, suppliers: Json):
+        self.search = search
+        self.suppliers = suppliers
+        self.calls: List[Call] = []
+        self.on_post: Optional[Callable[[Json], Optional[Json]]] = None
+        self.on_get: Optional[Callable[[str], Optional[Json]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    @property
+    def payloads(self) -> List[Json]:
+        """Payloads of search requests"""
+        return [call.payload for call in self.calls if call.method == "POST"]
+
+    @property
+    def structures(self) -> List[str]:
+        """Searched SMILES"""
+        return [payload["Structure"] for payload in self.payloads]
+
+    @property
+    def urls(self) -> List[str]:
+        """URLs of molecule requests"""
+        return [call.url for call in self.calls if call.method == "GET"]
+
+    @property
+    def api_keys(self) -> List[Optional[str]]:
+        return [call.api_key for call in self.calls]
+
+    def post(self, url: str, data: bytes) -> MockResponse:
+        payload = json.loads(data)
+        with self._lock:
+            self.calls.append(Call("POST", url, payload))
+        body = self.on_post(payload) if self.on_post is not None else None
+        return MockResponse(200, self.search if body is None else body)
+
+    def get(self, url: str) -> MockResponse:
+        with self._lock:
+            self.calls.append(Call("GET", url))
+        body = self.on_get(url) if self.on_get is not None else None
+        return MockResponse(200, self.suppliers if body is None else body)
+
+
+@pytest.fixture
+def search_data() -> Json:
+    return load_json(SEARCH_10_EXACT_SUCCESS)
+
+
+@pytest.fixture
+def suppliers_data() -> Json:
+    return load_json(SUP_SEARCH_SUCCESS)
+
+
+@pytest.fixture
+def bad_smiles_data() -> Json:
+    return load_json(BAD_SMILES_RESPONSE)
+
+
+@pytest.fixture
+def mock_api(monkeypatch: MonkeyPatch, search_data, suppliers_data) -> MockAPI:
+    api = MockAPI(search_data, suppliers_data)
+    monkeypatch.setattr(
+        "cloudscraper.CloudScraper.post",
+        lambda self, url, data=None, **kwargs: api.post(url, data),
+    )
+    monkeypatch.setattr(
+        "cloudscraper.CloudScraper.get",
+        lambda self, url, *args, **kwargs: api.get(url),
+    )
+    return api
+
+
+@pytest.fixture
+def molport() -> Molport:
+    molport = Molport()
+    molport.login(api_key=API_KEY)
+    return molport
@@ -0,0 +1,162 @@
+import pytest
+from molharbor import Molport
+from molharbor.batch import map_concurrent
+from molharbor.credentials import CredentialPool, Credentials
+from molharbor.enums import SearchType
+from molharbor.exceptions import LoginError
+
+QUOTA_EXCEEDED = {
+    "Result": {
+        "Status": 2,
+        "Message": "User is not recognized or allowed request count exceeded!",
+    },
+    "Data": {"Version": "v.3.0.2"},
+}
+WRONG_PASSWORD = {
+    "Result": {"Status": 2, "Message": "Username or password is incorrect!"},
+    "Data": {"Version": "v.3.0.2"},
+}
+
+
+def make_pool(*keys, **kwargs):
+    return CredentialPool([Credentials(api_key=key) for key in keys], **kwargs)
+
+
+def respond(key):
+    if key == "wrong":
+        return WRONG_PASSWORD
+    return QUOTA_EXCEEDED if key == "exhausted" else None
+
+
+@pytest.fixture
+def mock_api(mock_api):
+    mock_api.on_post = lambda payload: respond(payload["API Key"])
+    mock_api.on_get = lambda url: respond(url.split("apikey=")[1])
+    return mock_api
+
+
+def test_pool_validation():
+    with pytest.raises(ValueError):
+        CredentialPool([])
+    with pytest.raises(ValueError):
+        make_pool("a", strategy="random")
+    with pytest.raises(ValueError):
+        make_pool("a", cooldown=0)
+    with pytest.raises(LoginError):
+        CredentialPool([Credentials(username="user")])
+
+
+def test_pool_round_robin():
+    pool = make_pool("a", "b", "c")
+    keys = []
+    for _ in range(6):
+        name, credentials = pool.acquire()
+        keys.append(credentials.api_key)
+        pool.release(name)
+    assert keys == ["a", "b", "c", "a", "b", "c"]
+    assert all(s["requests"] == 2 for s in pool.stats().values())
+
+
+def test_pool_least_used():
+    pool = CredentialPool(
+        {"first": Credentials(api_key="a"), "second": Credentials(api_key="b")},
+        strategy="least_used",
+    )
+    first, _ = pool.acquire()
+    second, _ = pool.acquire()
+    assert (first, second) == ("first", "second")
+    pool.release(second)
+    # "first" is still in flight
+    assert pool.acquire()[0] == "second"
+    assert pool.stats()["second"]["requests"] == 2
+
+
+def test_pool_cooldown():
+    pool = make_pool("a", "b", cooldown=60)
+    name, _ = pool.acquire()
+    pool.release(name, LoginError("allowed request count exceeded!"))
+    assert pool.available == 1
+    assert pool.stats()[name]["quota_exceeded"] == 1
+    assert all(pool.acquire()[1].api_key == "b" for _ in range(3))
+    other, _ = pool.acquire()
+    pool.release(other, LoginError("allowed request count exceeded!"))
+    with pytest.raises(LoginError, match="request count exceeded"):
+        pool.acquire()
+    pool.reset()
+    assert pool.available == 2
+
+
+def test_pool_errors_do_not_disable_key():
+    pool = make_pool("a")
+    name, _ = pool.acquire()
+    pool.release(name, ValueError("bad response"))
+    assert pool.available == 1
+    assert pool.stats()[name]["errors"] == 1
+
+
+def test_molport_pool_retries_exhausted_key(mock_api):
+    pool = make_pool("exhausted", "a", "b")
+    molport = Molport()
+    molport.login(pool=pool)
+    assert molport.pool is pool
+    hits = molport.find("c1ccccc1", search_type=SearchType.EXACT)
+    assert len(hits) == 8
+    assert mock_api.api_keys == ["exhausted", "a"]
+    suppliers = molport.get_suppliers("Molport-000-871-563")
+    assert not suppliers.empty
+    assert mock_api.api_keys[-1] == "b"
+    stats = pool.stats()
+    assert stats["0"]["quota_exceeded"] == 1
+    assert not stats["0"]["available"]
+    assert pool.throughput() > 0
+
+
+def test_molport_pool_all_exhausted(mock_api):
+    molport = Molport()
+    molport.login(pool=make_pool("exhausted"))
+    with pytest.raises(LoginError):
+        molport.find("c1ccccc1")
+    with pytest.raises(LoginError):
+        molport.get_suppliers("Molport-000-871-563")
+    assert mock_api.api_keys == ["exhausted"]
+
+
+def test_molport_pool_retries_once_per_key(mock_api):
+    molport = Molport()
+    molport.login(pool=make_pool("exhausted", "exhausted", cooldown=1e-9))
+    with pytest.raises(LoginError, match="request count exceeded"):
+        molport.find("c1ccccc1")
+    assert mock_api.api_keys == ["exhausted", "exhausted"]
+
+
+def test_molport_pool_wrong_credentials(mock_api):
+    pool = make_pool("wrong", "a")
+    molport = Molport()
+    molport.login(pool=pool)
+    with pytest.raises(LoginError, match="Username or password is incorrect!"):
+        molport.find("c1ccccc1")
+    assert mock_api.api_keys == ["wrong"]
+    assert pool.available == 2
+    assert pool.stats()["0"]["quota_exceeded"] == 0
+
+
+def test_molport_pool_login(mock_api):
+    molport = Molport()
+    with pytest.raises(LoginError):
+        molport.login(api_key="a", pool=make_pool("b"))
+    molport.login(pool=make_pool("b"))
+    molport.login(api_key="a")
+    assert molport.pool is None
+    molport.find("c1ccccc1")
+    assert mock_api.api_keys == ["a"]
+
+
+def test_molport_pool_batch(mock_api):
+    pool = make_pool("a", "b", "c", "d")
+    molport = Molport()
+    molport.login(pool=pool)
+    queries = [f"C{'C' * i}" for i in range(20)]
+    results = map_concurrent(molport.find, queries, max_workers=4)
+    assert len(results) == 20
+    assert sorted(set(mock_api.api_keys)) == ["a", "b", "c", "d"]
+    assert sum(s["requests"] for s in pool.stats().values()) == 20
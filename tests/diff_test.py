@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+from molharbor import Molport, MolportCompound
+from molharbor.data import ResponseSupplier
+from molharbor.diff import diff_hits, diff_offers
+from molharbor.ids import encode_ids
+from molharbor.pricing import concat_suppliers
+from molharbor.schema import cast_suppliers
+
+
+@pytest.fixture
+def suppliers(suppliers_data):
+    response = ResponseSupplier.model_validate(suppliers_data)
+    return Molport().extract_suppliers(response)
+
+
+def test_diff_hits_frames():
+    old = pd.DataFrame(
+        {
+            "query": ["CCO", "CCO", "CCN", "CCC"],
+            "molport_id": [
+                "Molport-000-000-001",
+                "Molport-000-000-002",
+                "Molport-000-000-003",
+                None,
+            ],
+        }
+    )
+    new = pd.DataFrame(
+        {
+            "query": ["CCO", "CCO", "CCC", "CCN"],
+            "molport_id": [
+                "Molport-000-000-002",
+                "Molport-000-000-004",
+                "Molport-000-000-003",
+                None,
+            ],
+        }
+    )
+    diff = diff_hits(old, new)
+    assert list(diff.columns) == ["query", "molport_id", "change"]
+    assert diff.values.tolist() == [
+        ["CCO", "Molport-000-000-004", "added"],
+        ["CCC", "Molport-000-000-003", "added"],
+        ["CCO", "Molport-000-000-001", "removed"],
+        ["CCN", "Molport-000-000-003", "removed"],
+    ]
+    # integer ids are compared with strings
+    int_old = old.assign(molport_id=encode_ids(old["molport_id"]))
+    assert diff_hits(int_old, new)["change"].tolist() == diff["change"].tolist()
+    assert diff_hits(old, old).empty
+
+
+def test_diff_hits_mapping():
+    old = {"CCO": [MolportCompound("CCO", "Molport-000-000-001")], "CCN": []}
+    new = {
+        "CCO": [MolportCompound("CCO", "Molport-000-000-001")],
+        "CCN": [MolportCompound("CCN", "bad-id")],
+    }
+    diff = diff_hits(old, new)
+    assert diff.values.tolist() == [["CCN", "bad-id", "added"]]
+
+
+def test_diff_offers(suppliers):
+    old = concat_suppliers({"Molport-000-871-563": suppliers})
+    new = old.copy()
+    new.loc[0, "price"] = new.loc[0, "price"] + 10
+    new.loc[1, "delivery_days"] = 30
+    new = new.drop(index=2)
+    added = new.iloc[[3]].assign(catalog_id=1)
+    new = pd.concat([new, added], ignore_index=True)
+    diff = diff_offers(old, new)
+    assert diff["change"].value_counts().to_dict() == {
+        "changed": 2,
+        "added": 1,
+        "removed": 1,
+    }
+    changed = diff[diff["change"] == "changed"].reset_index(drop=True)
+    assert changed.loc[0, "price_new"] == pytest.approx(
+        changed.loc[0, "price_old"] + 10
+    )
+    assert changed.loc[1, "delivery_days_new"] == 30
+    removed = diff[diff["change"] == "removed"].iloc[0]
+    assert removed["catalog_id"] == old.loc[2, "catalog_id"]
+    assert pd.isna(removed["price_new"])
+    assert diff_offers(old, old).empty
+
+
+def test_diff_offers_mapping_and_int_ids(suppliers):
+    old = {"Molport-000-871-563": suppliers}
+    new = concat_suppliers({"Molport-000-871-563": suppliers}, int_ids=True)
+    new = new.iloc[1:]
+    diff = diff_offers(old, new)
+    assert diff["change"].tolist() == ["removed"]
+    assert diff_offers(old, new, values=["price"]).shape == (1, 7)
+
+
+def test_diff_offers_float32_and_float64(suppliers, tmp_path):
+    old = concat_suppliers({"Molport-000-871-563": suppliers})
+    old["price"] = pd.Series([12.3, 45.67] * (len(old) // 2) + [0.1] * (len(old) % 2))
+    old = cast_suppliers(old)
+    assert old["price"].dtype == "float32"
+    old.to_csv(tmp_path / "old.csv", index=False)
+    # read back as float64
+    new = pd.read_csv(tmp_path / "old.csv")
+    assert new["price"].dtype == "float64"
+    assert diff_offers(old, new).empty
+    new.loc[0, "price"] = 12.31
+    diff = diff_offers(old, new)
+    assert diff["change"].tolist() == ["changed"]
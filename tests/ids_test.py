@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from molharbor import MolportCompound
+from molharbor.ids import decode_id, decode_ids, encode_id, encode_ids
+
+
+@pytest.mark.parametrize(
+    "molport_id, value",
+    [
+        ("Molport-000-871-563", 871563),
+        ("Molport-002-266-780", 2266780),
+        ("Molport-051-434-827", 51434827),
+        ("Molport-000-000-000", 0),
+        ("Molport-999-999-999", 999999999),
+    ],
+)
+def test_roundtrip(molport_id, value):
+    assert encode_id(molport_id) == value
+    assert decode_id(value) == molport_id
+
+
+def test_encode_case_insensitive_prefix():
+    assert encode_id("MolPort-002-266-780") == 2266780
+
+
+@pytest.mark.parametrize(
+    "molport_id",
+    [
+        "",
+        "Molport-000-871-56",
+        "Molport-000-871-5634",
+        "Molport-000-871-56x",
+        "Molport_000-871-563",
+        "Chembl-000-871-563",
+        "Molport-000-8710563",
+    ],
+)
+def test_encode_invalid(molport_id):
+    with pytest.raises(ValueError):
+        encode_id(molport_id)
+    assert encode_ids([molport_id], errors="coerce")[0] == -1
+
+
+def test_encode_series_keeps_index_and_missing():
+    ids = pd.Series(["Molport-000-871-563", None, "bad"], index=[5, 6, 7], name="id")
+    encoded = encode_ids(ids, errors="coerce")
+    assert encoded.dtype == "Int64"
+    assert encoded.name == "id"
+    assert encoded.tolist() == [871563, pd.NA, pd.NA]
+    decoded = decode_ids(encoded)
+    assert list(decoded.index) == [5, 6, 7]
+    assert decoded[5] == "Molport-000-871-563"
+    assert decoded[6:].isna().all()
+
+
+def test_vectorized_roundtrip():
+    values = np.random.default_rng(42).integers(0, 10**9, 10000)
+    decoded = decode_ids(values)
+    assert decoded.dtype.kind == "U"
+    np.testing.assert_array_equal(encode_ids(decoded), values)
+
+
+def test_decode_out_of_range():
+    with pytest.raises(ValueError):
+        decode_ids([10**9])
+    with pytest.raises(ValueError):
+        decode_ids([-1])
+
+
+def test_empty():
+    assert len(encode_ids([])) == 0
+    assert len(decode_ids([])) == 0
+
+
+def test_compound_numeric_id():
+    compound = MolportCompound("OC(=O)c1ccccc1", "Molport-000-871-563")
+    assert compound.numeric_id == 871563
@@ -0,0 +1,140 @@
+import threading
+import time
+import pytest
+from molharbor.enums import SearchType
+from molharbor.jobs import BatchJob, JobState, find_job, suppliers_job
+
+
+class Gate:
+    """Function blocking until released, to control in-flight calls"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+        self.lock = threading.Lock()
+
+    def __call__(self, item):
+        with self.lock:
+            self.started.append(item)
+        self.release.wait(5)
+        if item < 0:
+            raise ValueError(f"negative item {item}")
+        return item * 2
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_job_results():
+    job = BatchJob(lambda x: x * 2, [3, 1, 2, 1], max_workers=2)
+    assert job.state == JobState.RUNNING
+    assert job.wait() == {3: 6, 1: 2, 2: 4}
+    assert job.done
+    assert job.state == JobState.DONE
+    stats = job.stats()
+    assert stats["completed"] == 3
+    assert stats["pending"] == 0
+    assert stats["eta"] == 0.0
+    assert stats["rate"] > 0
+
+
+def test_job_empty():
+    assert BatchJob(str, []).wait() == {}
+
+
+def test_job_errors():
+    job = BatchJob(lambda x: 1 // x, [1, 0, 2], max_workers=1, errors="ignore")
+    assert job.wait() == {1: 1, 2: 0}
+    assert job.failed == 1
+    assert isinstance(job.failures[0], ZeroDivisionError)
+
+    job = BatchJob(lambda x: 1 // x, [0, 1, 2], max_workers=1)
+    with pytest.raises(ZeroDivisionError):
+        job.wait()
+    assert job.state == JobState.CANCELLED
+    assert job.pending == 2
+
+
+def test_job_pause_drains_in_flight():
+    gate = Gate()
+    job = BatchJob(gate, range(10), max_workers=2).start()
+    wait_until(lambda: job.in_flight == 2)
+    job.pause()
+    gate.release.set()
+    wait_until(lambda: job.in_flight == 0)
+    time.sleep(0.05)
+    # in-flight calls are completed, no new calls are started while paused
+    assert job.state == JobState.PAUSED
+    assert job.completed == 2
+    assert job.pending == 8
+    assert sorted(job.results) == sorted(gate.started)
+    assert not job.done
+    job.resume()
+    assert len(job.wait(timeout=5)) == 10
+
+
+def test_job_cancel():
+    gate = Gate()
+    job = BatchJob(gate, range(10), max_workers=3).start()
+    wait_until(lambda: job.in_flight == 3)
+    threading.Timer(0.05, gate.release.set).start()
+    job.cancel()
+    assert job.done
+    assert job.state == JobState.CANCELLED
+    assert job.completed == 3
+    assert job.pending == 7
+    assert len(job.wait()) == 3
+    job.resume()
+    assert job.state == JobState.CANCELLED
+
+
+def test_job_cancel_paused():
+    gate = Gate()
+    with BatchJob(gate, range(5), max_workers=1) as job:
+        job.start()
+        job.pause()
+        gate.release.set()
+    assert job.state == JobState.CANCELLED
+    assert job.completed <= 1
+
+
+def test_job_timeout_and_eta():
+    gate = Gate()
+    job = BatchJob(gate, range(4), max_workers=1).start()
+    with pytest.raises(TimeoutError):
+        job.wait(timeout=0.01)
+    assert job.eta is None
+    gate.release.set()
+    job.wait()
+    with pytest.raises(RuntimeError):
+        job.start()
+
+
+def test_job_progress_bar():
+    job = BatchJob(lambda x: x, range(5), progress=True, errors="ignore")
+    assert len(job.wait()) == 5
+    assert job._bar.n == 5
+
+
+def test_job_progress_bar_closed_without_wait():
+    job = BatchJob(lambda x: x, range(5), progress=True).start()
+    wait_until(lambda: job.done)
+    assert job._bar_closed
+    with BatchJob(lambda x: x, range(5), progress=True) as job:
+        pass
+    assert job.state == JobState.CANCELLED
+    assert job._bar_closed
+
+
+def test_find_and_suppliers_jobs(mock_api, molport):
+    job = find_job(molport, ["CCO", "CCN"], search_type=SearchType.EXACT)
+    hits = job.wait()
+    assert [len(h) for h in hits.values()] == [8, 8]
+    ids = [hit.molport_id for hit in hits["CCO"][:2]]
+    frames = suppliers_job(molport, ids, max_workers=2).wait()
+    assert list(frames) == ids
+    assert all(not frame.empty for frame in frames.values())
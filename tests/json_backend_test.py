@@ -0,0 +1,49 @@
+import json
+import pytest
+from pydantic import ValidationError
+from molharbor import json_backend
+from molharbor.data import Response, ResponseSupplier
+from .conftest import SEARCH_10_EXACT_SUCCESS, SUP_SEARCH_SUCCESS
+
+
+@pytest.fixture
+def restore_backend():
+    backend = json_backend.get_backend()
+    yield
+    json_backend.set_backend(backend)
+
+
+def test_stdlib_always_available():
+    assert "json" in json_backend.available_backends()
+
+
+@pytest.mark.parametrize("backend", ["orjson", "msgspec", "json"])
+def test_roundtrip(backend, restore_backend):
+    pytest.importorskip(backend)
+    json_backend.set_backend(backend)
+    assert json_backend.get_backend() == backend
+    payload = {"Structure": "CCO", "Search Type": 3, "Chemical Similarity Index": 0.9}
+    encoded = json_backend.dumps(payload)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == payload
+    assert json_backend.loads(encoded) == payload
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        json_backend.set_backend("simplejson")
+
+
+@pytest.mark.parametrize(
+    "model, path",
+    [(Response, SEARCH_10_EXACT_SUCCESS), (ResponseSupplier, SUP_SEARCH_SUCCESS)],
+)
+def test_parse_model_matches_dict_validation(model, path):
+    with open(path, "rb") as f:
+        content = f.read()
+    assert json_backend.parse_model(model, content) == model(**json.loads(content))
+
+
+def test_parse_model_invalid_json():
+    with pytest.raises(ValidationError):
+        json_backend.parse_model(Response, b"<html>Just a moment...</html>")
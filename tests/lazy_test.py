@@ -0,0 +1,59 @@
+import pytest
+from pydantic import ValidationError
+from molharbor.data import Result, ResponseSupplier, Supplier
+from molharbor.lazy import LazyList, LazyModel
+
+
+def test_lazy_model_fields(suppliers_data):
+    response = LazyModel(ResponseSupplier, suppliers_data)
+    assert isinstance(response.result, LazyModel)
+    assert response.result.status == 1
+    molecule = response.data.molecule
+    assert molecule.molport_id == suppliers_data["Data"]["Molecule"]["Molport Id"]
+    assert response.to_model() == ResponseSupplier.model_validate(suppliers_data)
+    with pytest.raises(AttributeError):
+        response.unknown_field
+
+
+def test_lazy_list_memoized(suppliers_data):
+    catalogues = LazyModel(ResponseSupplier, suppliers_data).data.molecule.catalogues
+    suppliers = catalogues.screening_block_suppliers
+    assert isinstance(suppliers, LazyList)
+    assert "validated=0" in repr(suppliers)
+    first = suppliers[0]
+    assert isinstance(first, Supplier)
+    assert suppliers[0] is first
+    assert "validated=1" in repr(suppliers)
+    assert suppliers[:2][0] is first
+    assert len(list(suppliers)) == len(suppliers)
+    # category is memoized as well
+    assert catalogues.screening_block_suppliers is suppliers
+
+
+def test_lazy_validation_is_partial(suppliers_data):
+    suppliers_data["Data"]["Molecule"]["Synonyms"] = "not a list"
+    response = LazyModel(ResponseSupplier, suppliers_data)
+    assert response.data.molecule.catalogues.building_block_suppliers is not None
+    with pytest.raises(ValidationError):
+        response.data.molecule.synonyms
+    with pytest.raises(ValidationError):
+        response.to_model()
+
+
+def test_lazy_missing_field():
+    result = LazyModel(Result, {"Status": 1})
+    assert result.status == 1
+    with pytest.raises(ValidationError):
+        result.message
+    with pytest.raises(ValidationError):
+        LazyModel(Result, [1, 2])
+
+
+def test_get_suppliers_lazy(mock_api, molport):
+    response = molport.get_suppliers(
+        "Molport-000-871-563", return_response=True, lazy=True
+    )
+    assert isinstance(response, LazyModel)
+    eager = molport.get_suppliers("Molport-000-871-563")
+    lazy = molport.get_suppliers("Molport-000-871-563", lazy=True)
+    assert lazy.equals(eager)
@@ -1,9 +1,13 @@
+import json
+
+
 class MockResponse:
     """Mocking the response object from `httpx` library.
 
     Args:
         status_code (int): status code of the response
         json_data (dict): json data of the response would be returned by .json() method
+            and serialized as raw body in .content attribute
         text (str, optional): text of the response. Defaults to "".
     """
 
@@ -12,6 +16,10 @@ class MockResponse:
         self.json_data = json_data
         self.text = text
 
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self.json_data).encode()
+
     def json(self) -> dict:
         return self.json_data
 
@@ -0,0 +1,134 @@
+import time
+import pytest
+from pytest import MonkeyPatch
+from molharbor import Molport
+from molharbor.batch import map_concurrent
+from molharbor.enums import SearchType
+from molharbor.exceptions import UnknownSearchTypeException
+from molharbor.negative import NegativeCache, search_key
+from .conftest import API_KEY, NO_RESULTS
+
+
+@pytest.fixture
+def available():
+    return {"c1ccccc1"}
+
+
+@pytest.fixture
+def mock_api(mock_api, available):
+    mock_api.on_post = lambda p: None if p["Structure"] in available else NO_RESULTS
+    return mock_api
+
+
+@pytest.fixture
+def molport():
+    molport = Molport(negative_cache=NegativeCache(capacity=1000))
+    molport.login(api_key=API_KEY)
+    return molport
+
+
+def test_search_key():
+    assert search_key("CCO", SearchType.EXACT) == search_key("CCO", 3)
+    assert search_key("CCO", SearchType.EXACT) != search_key("CCO", SearchType.PERFECT)
+    assert search_key("CCO", 3, 0.5) == search_key("CCO", 3, 0.9)
+    assert search_key("CCO", 4, 0.5) != search_key("CCO", 4, 0.9)
+    with pytest.raises(UnknownSearchTypeException):
+        search_key("CCO", 10)
+
+
+def test_negative_cache_false_positive_rate():
+    cache = NegativeCache(capacity=2000, error_rate=0.01)
+    recorded = [search_key(f"C{i}", 3) for i in range(2000)]
+    for key in recorded:
+        cache.add(key)
+    assert cache.contains_many(recorded).all()
+    others = [search_key(f"N{i}", 3) for i in range(20000)]
+    assert cache.contains_many(others).mean() < 0.02
+    assert len(cache) == 2000
+
+
+def test_negative_cache_discard():
+    cache = NegativeCache(capacity=10)
+    key = search_key("CCO", 3)
+    cache.discard(key)
+    assert key not in cache
+    cache.add(key)
+    assert key in cache
+    cache.discard(key)
+    assert key not in cache
+    cache.add(key)
+    assert key in cache
+
+
+def test_negative_cache_expiry(monkeypatch: MonkeyPatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = NegativeCache(capacity=10, ttl=100, generations=2)
+    first, second = search_key("C", 3), search_key("CC", 3)
+    cache.add(first)
+    now[0] += 60
+    cache.add(second)
+    assert len(cache._generations) == 2
+    now[0] += 50
+    assert first not in cache
+    assert second in cache
+    now[0] += 60
+    assert second not in cache
+    assert len(cache) == 0
+
+
+def test_negative_cache_capacity():
+    cache = NegativeCache(capacity=2, ttl=None, generations=3)
+    for i in range(5):
+        cache.add(search_key(f"C{i}", 3))
+    assert len(cache._generations) == 3
+    assert cache.contains_many([search_key(f"C{i}", 3) for i in range(5)]).all()
+    # without expiry the oldest generation is dropped to bound the memory use
+    nbytes = cache.nbytes
+    cache.add(search_key("C5", 3))
+    cache.add(search_key("C6", 3))
+    assert len(cache._generations) == 3
+    assert cache.nbytes == nbytes
+    keys = [search_key(f"C{i}", 3) for i in range(7)]
+    assert cache.contains_many(keys).tolist()[2:] == [True] * 5
+    assert len(cache) == 5
+
+
+def test_negative_cache_save_load(tmp_path):
+    cache = NegativeCache(capacity=100, error_rate=0.01, ttl=None)
+    keys = [search_key(f"C{i}", 3) for i in range(50)]
+    for key in keys:
+        cache.add(key)
+    cache.discard(keys[0])
+    path = tmp_path / "misses.npz"
+    cache.save(path)
+    loaded = NegativeCache.load(path)
+    assert loaded.ttl is None
+    assert loaded.num_bits == cache.num_bits
+    assert keys[0] not in loaded
+    assert loaded.contains_many(keys[1:]).all()
+    assert len(loaded) == 50
+
+
+def test_find_skips_known_misses(molport, mock_api, available):
+    assert molport.find("CCO", search_type=SearchType.EXACT) == []
+    assert molport.find("CCO", search_type=SearchType.EXACT) == []
+    assert mock_api.structures == ["CCO"]
+    # other search type is not a known miss
+    molport.find("CCO", search_type=SearchType.SUBSTRUCTURE)
+    assert len(mock_api) == 2
+    available.add("CCO")
+    assert molport.find("CCO", search_type=SearchType.EXACT) == []
+    hits = molport.find("CCO", search_type=SearchType.EXACT, recheck=True)
+    assert len(hits) == 8
+    assert len(molport.find("CCO", search_type=SearchType.EXACT)) == 8
+    assert mock_api.structures == ["CCO", "CCO", "CCO", "CCO"]
+
+
+def test_batch_skips_known_misses(molport, mock_api):
+    queries = ["c1ccccc1", "CCO", "CCN", "CCC"]
+    map_concurrent(molport.find, queries, max_workers=2)
+    assert len(mock_api) == 4
+    results = map_concurrent(molport.find, queries, max_workers=2)
+    assert mock_api.structures[4:] == ["c1ccccc1"]
+    assert [len(hits) for hits in results.values()] == [8, 0, 0, 0]
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+from pytest import MonkeyPatch
+from molharbor.enums import SearchType
+from molharbor.exceptions import MolportHTTPError
+from molharbor.pipeline import run_pipeline
+from .mock import MockResponse
+
+
+@pytest.fixture
+def mock_api(mock_api, bad_smiles_data):
+    mock_api.on_post = lambda p: bad_smiles_data if p["Structure"] == "VCX" else None
+    return mock_api
+
+
+def test_pipeline(molport, mock_api):
+    result = run_pipeline(
+        molport,
+        ["C1=CC=CC=C1", "c1ccccc1", "VCX", "C1=CC=CC=C1"],
+        search_type=SearchType.EXACT,
+        search_workers=2,
+        supplier_workers=3,
+        queue_size=2,
+    )
+    assert sorted(mock_api.structures) == ["C1=CC=CC=C1", "VCX", "c1ccccc1"]
+    # both queries return the same 8 hits, suppliers are fetched once per hit
+    assert len(mock_api.urls) == 8
+    assert list(result.columns[:3]) == ["query", "molport_id", "molport_smiles"]
+    assert set(result["query"]) == {"C1=CC=CC=C1", "c1ccccc1"}
+    assert result.groupby("query")["molport_id"].nunique().tolist() == [8, 8]
+    assert isinstance(result["supplier_name"].dtype, pd.CategoricalDtype)
+
+
+def test_pipeline_top_n_and_output(molport, mock_api, tmp_path):
+    output = tmp_path / "hits.csv"
+    result = run_pipeline(
+        molport, ["C1=CC=CC=C1"], search_type=SearchType.EXACT, top_n=2, output=output
+    )
+    assert len(mock_api.urls) == 2
+    written = pd.read_csv(output)
+    assert len(written) == len(result)
+    assert set(written["molport_id"]) == set(result["molport_id"])
+
+
+def test_pipeline_no_hits(molport, mock_api):
+    result = run_pipeline(molport, ["VCX"], search_type=SearchType.EXACT)
+    assert result.empty
+    assert list(result.columns[:3]) == ["query", "molport_id", "molport_smiles"]
+
+
+def test_pipeline_errors(molport, mock_api, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(
+        "cloudscraper.CloudScraper.get",
+        lambda *args, **kwargs: MockResponse(503, {}, "Service Unavailable"),
+    )
+    with pytest.raises(MolportHTTPError):
+        run_pipeline(
+            molport, ["C1=CC=CC=C1"], search_type=SearchType.EXACT, errors="raise"
+        )
+    result = run_pipeline(molport, ["C1=CC=CC=C1"], search_type=SearchType.EXACT)
+    assert result.empty
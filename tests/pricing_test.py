@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+from molharbor.data import ResponseSupplier
+from molharbor.pricing import (
+    best_offers,
+    concat_suppliers,
+    normalize_offers,
+    supplier_coverage,
+)
+
+
+@pytest.fixture
+def suppliers(molport, suppliers_data):
+    response = ResponseSupplier(**suppliers_data)
+    df = molport.extract_suppliers(response)
+    return concat_suppliers(
+        {"Molport-002-325-020": df, "Molport-000-871-563": df.iloc[19:]}
+    )
+
+
+def test_concat_suppliers(suppliers):
+    assert suppliers.columns[-1] == "molport_id"
+    assert isinstance(suppliers["supplier_name"].dtype, pd.CategoricalDtype)
+    assert suppliers["molport_id"].nunique() == 2
+
+
+def test_concat_suppliers_empty():
+    assert concat_suppliers({}).empty
+
+
+def test_normalize_offers_units(suppliers):
+    offers = normalize_offers(
+        suppliers.assign(currency="EUR"),
+        rates={"EUR": 2.0},
+        molecular_weight={"Molport-002-325-020": 274.32},
+    )
+    row = offers.iloc[0]
+    assert row["measure"] == "μmol"
+    assert row["amount_mg"] == pytest.approx(0.27432)
+    assert row["price_converted"] == pytest.approx(2 * row["price"])
+    assert row["price_per_mg"] == pytest.approx(row["price_converted"] / 0.27432)
+    mg = offers[offers["measure"] == "mg"]
+    np.testing.assert_allclose(mg["amount_mg"], mg["amount"])
+    # no molecular weight for the second compound
+    other = offers[offers["molport_id"] == "Molport-000-871-563"]
+    assert other.loc[other["measure"] == "μmol", "amount_mg"].isna().all()
+
+
+def test_normalize_offers_unknown_currency(suppliers):
+    offers = normalize_offers(suppliers.assign(currency="GBP"))
+    assert offers["price_converted"].isna().all()
+
+
+def test_best_offers(suppliers):
+    offers = normalize_offers(suppliers)
+    best = best_offers(offers, min_amount_mg=5, max_delivery_days=16)
+    # Princeton BioMolecular Research does not report stock
+    assert list(best.index) == ["Molport-002-325-020"]
+    assert (best["amount_mg"] >= 5).all()
+    for molport_id, row in best.iterrows():
+        candidates = offers[
+            (offers["molport_id"] == molport_id)
+            & (offers["amount_mg"] >= 5)
+            & (offers["stock_mg"] >= offers["amount_mg"])
+        ]
+        assert row["price_converted"] == candidates["price_converted"].min()
+
+
+def test_best_offers_ignore_stock(suppliers):
+    offers = normalize_offers(suppliers)
+    best = best_offers(offers, min_amount_mg=5, in_stock=False)
+    assert list(best.index) == ["Molport-000-871-563", "Molport-002-325-020"]
+    assert best.loc["Molport-000-871-563", "price_converted"] == 90.0
+
+
+def test_best_offers_delivery(suppliers):
+    offers = normalize_offers(suppliers)
+    assert best_offers(offers, max_delivery_days=1).empty
+
+
+def test_best_offers_not_normalized(suppliers):
+    with pytest.raises(ValueError):
+        best_offers(suppliers)
+
+
+def test_supplier_coverage(suppliers):
+    coverage = supplier_coverage(normalize_offers(suppliers))
+    assert coverage.loc["Princeton BioMolecular Research (SC)", "coverage"] == 1.0
+    assert coverage.loc["Vitas M Chemical Limited", "compounds"] == 1
+    assert "median_price_per_mg" in coverage
+
+
+def test_normalize_offers_stock_amount_of_substance(suppliers):
+    df = suppliers.iloc[:1].assign(stock=10.0, stock_measure="μmol")
+    offers = normalize_offers(df, molecular_weight={"Molport-002-325-020": 274.32})
+    assert offers["stock_mg"].iloc[0] == pytest.approx(2.7432)
+    assert normalize_offers(df)["stock_mg"].isna().all()
+
+
+def test_best_offers_unconverted_amounts(suppliers):
+    df = suppliers.iloc[:2].copy()
+    df["molport_id"] = ["Molport-000-000-001", "Molport-000-000-002"]
+    df["measure"] = df["measure"].cat.add_categories(["mL"])
+    df.loc[0, "measure"] = "mL"
+    df["stock"] = [1000.0, 1000.0]
+    df["stock_measure"] = df["stock_measure"].cat.add_categories(["mL", "μmol"])
+    df.loc[0, "stock_measure"] = "mL"
+    offers = normalize_offers(df)
+    assert offers["amount_mg"].isna().all()
+    best = best_offers(offers)
+    # mL stock covers mL packing, μmol packing could not be compared to mg stock
+    assert best["verified"].tolist() == [True, False]
+    best = best_offers(offers, min_amount_mg=5, in_stock=False)
+    assert len(best) == 2
+    assert not best["verified"].any()
+
+
+def test_best_offers_prefers_verified(suppliers):
+    offers = normalize_offers(suppliers.iloc[:19])
+    best = best_offers(offers, min_amount_mg=5)
+    # cheaper μmol packings of unknown mass are not selected
+    row = best.loc["Molport-002-325-020"]
+    assert row["verified"]
+    assert row["measure"] == "mg"
+    assert row["price_converted"] == 63.0
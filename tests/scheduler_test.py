@@ -0,0 +1,119 @@
+import threading
+import time
+import pytest
+from pytest import MonkeyPatch
+from molharbor import Molport
+from molharbor.batch import map_concurrent
+from molharbor.enums import Priority, SearchType
+from molharbor.scheduler import (
+    PriorityScheduler,
+    ScheduledTransport,
+    current_priority,
+    request_priority,
+)
+from .conftest import API_KEY
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.001)
+
+
+def run_queued(scheduler, priorities):
+    """Hold the only slot, queue requests one by one and record dispatch order"""
+    order = []
+    scheduler.acquire(Priority.INTERACTIVE)
+
+    def request(i, p):
+        with scheduler.slot(p):
+            order.append(i)
+
+    threads = []
+    for i, p in enumerate(priorities):
+        thread = threading.Thread(target=request, args=(i, p))
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda: scheduler.waiting == i + 1)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_interactive_jumps_ahead_of_bulk():
+    scheduler = PriorityScheduler(max_concurrency=1)
+    order = run_queued(scheduler, [Priority.BULK] * 4 + [Priority.INTERACTIVE])
+    assert order[0] == 4
+    assert scheduler.stats()["dispatched_bulk"] == 4
+
+
+def test_bulk_keeps_progressing():
+    scheduler = PriorityScheduler(
+        max_concurrency=1,
+        weights={Priority.INTERACTIVE: 2, Priority.BULK: 1},
+    )
+    priorities = [Priority.BULK] * 3 + [Priority.INTERACTIVE] * 6
+    order = run_queued(scheduler, priorities)
+    # bulk requests are interleaved with interactive ones instead of starving
+    assert order.index(1) < order.index(8)
+
+
+def test_rate_limit():
+    scheduler = PriorityScheduler(max_concurrency=4, rate=100.0, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        with scheduler.slot():
+            pass
+    assert time.monotonic() - start >= 0.04
+
+
+def test_request_priority_context():
+    assert current_priority() == Priority.INTERACTIVE
+    with request_priority(Priority.BULK):
+        assert current_priority() == Priority.BULK
+        assert map_concurrent(lambda _: current_priority(), [1]) == {1: Priority.BULK}
+    assert current_priority() == Priority.INTERACTIVE
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"max_concurrency": 0}, {"weights": {Priority.BULK: 0}}, {"rate": 0}],
+)
+def test_invalid_scheduler(kwargs):
+    with pytest.raises(ValueError):
+        PriorityScheduler(**kwargs)
+
+
+def test_molport_with_scheduler(mock_api):
+    scheduler = PriorityScheduler(max_concurrency=2)
+    molport = Molport(scheduler=scheduler)
+    molport.login(api_key=API_KEY)
+    assert isinstance(molport.transport, ScheduledTransport)
+    molport.find("C1=CC=CC=C1", search_type=SearchType.EXACT)
+    molport.find("C1=CC=CC=C1", search_type=SearchType.EXACT, priority=Priority.BULK)
+    stats = scheduler.stats()
+    assert stats["dispatched_interactive"] == 1
+    assert stats["dispatched_bulk"] == 1
+
+
+def test_interrupted_wait_leaves_queue(monkeypatch: MonkeyPatch):
+    scheduler = PriorityScheduler(max_concurrency=1)
+    scheduler.acquire()
+
+    def interrupt(timeout=None):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as m:
+        m.setattr(scheduler._condition, "wait", interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            scheduler.acquire(Priority.INTERACTIVE)
+    assert scheduler.waiting == 0
+    scheduler.release()
+    # a stale entry at the head of the queue would block this request forever
+    thread = threading.Thread(target=scheduler.acquire, args=(Priority.BULK,))
+    thread.start()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert scheduler.in_flight == 1
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+import pytest
+import requests
+from molharbor.session import SessionPool
+
+
+def test_pool_reuses_sessions():
+    pool = SessionPool(requests.Session, max_size=2)
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        assert second is first
+    assert pool.size == 1
+
+
+def test_pool_is_bounded():
+    pool = SessionPool(requests.Session, max_size=3)
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def work(_):
+        nonlocal active, peak
+        with pool.session():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(32)))
+    assert peak <= 3
+    assert pool.size <= 3
+
+
+def test_pool_copies_seed_cookies():
+    pool = SessionPool(requests.Session, max_size=2)
+    pool.seed.cookies.set("cf_clearance", "token")
+    with pool.session() as first, pool.session() as second:
+        assert first is not second
+        assert second.cookies.get("cf_clearance") == "token"
+
+
+def test_pool_shares_seed_user_agent():
+    pool = SessionPool(max_size=5)
+    user_agent = pool.seed.headers["User-Agent"]
+    with ExitStack() as stack:
+        sessions = [stack.enter_context(pool.session()) for _ in range(5)]
+    assert len({id(session) for session in sessions}) == 5
+    assert all(s.headers["User-Agent"] == user_agent for s in sessions)
+
+
+def test_pool_invalid_size():
+    with pytest.raises(ValueError):
+        SessionPool(requests.Session, max_size=0)
@@ -0,0 +1,151 @@
+import time
+import pytest
+from molharbor import Molport
+from molharbor.data import Molecule
+from molharbor.enums import SearchType
+from molharbor.similarity import SimilarityCache, SimilarityResult
+from .conftest import API_KEY
+
+SIMILARITIES = [1.0, 0.95, 0.7, 0.9, 0.85, 0.8, 0.75, 0.9, 0.72, 0.7]
+
+
+def molecules(similarities):
+    return [
+        Molecule(
+            **{
+                "Id": i,
+                "MolPort Id": f"Molport-000-000-{i:03d}",
+                "SMILES": f"C{i}",
+                "Similarity Index": value,
+            }
+        )
+        for i, value in enumerate(similarities)
+    ]
+
+
+@pytest.fixture
+def search_data(search_data):
+    for mol, value in zip(search_data["Data"]["Molecules"], SIMILARITIES):
+        mol["Similarity Index"] = value
+    return search_data
+
+
+def time_limited(payload):
+    if "Maximum Search Time" in payload:
+        time.sleep(payload["Maximum Search Time"] / 1000)
+
+
+@pytest.fixture
+def mock_api(mock_api):
+    mock_api.on_post = time_limited
+    return mock_api
+
+
+def make_molport(cache=None):
+    molport = Molport(similarity_cache=cache)
+    molport.login(api_key=API_KEY)
+    return molport
+
+
+def test_similarity_result_filter():
+    result = SimilarityResult(0.7, molecules(SIMILARITIES))
+    assert len(result) == 10
+    assert [i for _, i in result.filter(0.9)] == [
+        "Molport-000-000-000",
+        "Molport-000-000-001",
+        "Molport-000-000-003",
+        "Molport-000-000-007",
+    ]
+    assert len(result.filter(0.7)) == 10
+    assert len(result.filter(0.71)) == 8
+    assert result.filter(1.01) == []
+
+
+def test_similarity_result_missing_index():
+    mols = molecules([0.8, 0.7, 0.6])
+    mols[1] = Molecule.model_construct(molport_id="Molport-000-000-001", smiles="C1")
+    result = SimilarityResult(0.5, mols)
+    assert [s for s, _ in result.filter(0.5)] == ["C0", "C2"]
+
+
+def test_similarity_result_covers():
+    result = SimilarityResult(0.7, molecules(SIMILARITIES))
+    assert result.covers(0.7)
+    assert result.covers(0.95)
+    assert not result.covers(0.6)
+    truncated = SimilarityResult(0.7, molecules([1.0, 0.9, 0.8]), truncated=True)
+    assert truncated.covers(0.85)
+    assert not truncated.covers(0.8)
+    assert not SimilarityResult(0.7, [], truncated=True).covers(0.9)
+
+
+def test_similarity_cache():
+    cache = SimilarityCache(maxsize=2)
+    cache.store("C", SimilarityResult(0.8, molecules([0.9])))
+    assert cache.lookup("C", 0.9) is not None
+    assert cache.lookup("C", 0.7) is None
+    # result with a higher threshold does not replace a more complete one
+    cache.store("C", SimilarityResult(0.9, []))
+    assert len(cache.lookup("C", 0.85)) == 1
+    cache.store("CC", SimilarityResult(0.8, []))
+    cache.store("CCC", SimilarityResult(0.8, []))
+    assert len(cache) == 2
+    assert cache.lookup("C", 0.9) is None
+    assert cache.hits == 2
+    assert cache.misses == 2
+
+
+def test_similarity_sweep(mock_api):
+    molport = make_molport()
+    sweep = molport.similarity_sweep("c1ccccc1", [0.9, 0.7, 0.8])
+    assert len(mock_api) == 1
+    assert mock_api.payloads[0]["Chemical Similarity Index"] == 0.7
+    assert mock_api.payloads[0]["Search Type"] == SearchType.SIMILARITY.value
+    assert list(sweep) == [0.9, 0.7, 0.8]
+    assert [len(sweep[t]) for t in sweep] == [4, 8, 6]
+    direct = molport.find("c1ccccc1", search_type=SearchType.SIMILARITY, similarity=0.7)
+    assert sweep[0.7] == direct
+
+
+def test_similarity_sweep_no_thresholds(mock_api):
+    with pytest.raises(ValueError):
+        make_molport().similarity_sweep("c1ccccc1", [])
+
+
+def test_find_uses_similarity_cache(mock_api):
+    cache = SimilarityCache()
+    molport = make_molport(cache)
+    molport.similarity_sweep("c1ccccc1", [0.7, 0.9])
+    hits = molport.find("c1ccccc1", search_type=SearchType.SIMILARITY, similarity=0.85)
+    assert len(hits) == 5
+    assert len(mock_api) == 1
+    # lower threshold is not covered by the cached result
+    molport.find("c1ccccc1", search_type=4, similarity=0.6)
+    assert len(mock_api) == 2
+    # other search types are not cached
+    molport.find("c1ccccc1", search_type=SearchType.EXACT)
+    molport.find("c1ccccc1", search_type=SearchType.EXACT)
+    assert len(mock_api) == 4
+
+
+def test_cached_find_respects_max_results(mock_api):
+    molport = make_molport(SimilarityCache())
+    molport.similarity_sweep("c1ccccc1", [0.7])
+    hits = molport.find(
+        "c1ccccc1", search_type=SearchType.SIMILARITY, similarity=0.7, max_results=2
+    )
+    assert len(mock_api) == 1
+    assert hits == molport.similarity_sweep("c1ccccc1", [0.7])[0.7][:2]
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"max_results": 8}, {"max_search_time": 1}], ids=["results", "time"]
+)
+def test_incomplete_results_are_not_cached(mock_api, kwargs):
+    cache = SimilarityCache()
+    molport = make_molport(cache)
+    sweep = molport.similarity_sweep("c1ccccc1", [0.7, 0.9], **kwargs)
+    assert len(sweep[0.7]) == 8
+    assert len(cache) == 0
+    molport.find("c1ccccc1", search_type=SearchType.SIMILARITY, similarity=0.9)
+    assert len(mock_api) == 2
@@ -0,0 +1,154 @@
+import gzip
+import json
+import pytest
+import requests
+from pytest import MonkeyPatch
+from molharbor import Molport
+from molharbor.data import ResponseSupplier
+from molharbor.enums import SearchType
+from molharbor.exceptions import ReplayMissError
+from molharbor.session import SessionPool
+from molharbor.transport import (
+    CachingTransport,
+    HTTPTransport,
+    RecordingTransport,
+    ReplayTransport,
+    Transport,
+    read_archive,
+    request_key,
+)
+from .conftest import API_KEY
+from .mock import MockResponse
+
+
+@pytest.fixture
+def archive(tmp_path, mock_api):
+    path = tmp_path / "molport.jsonl.gz"
+    transport = RecordingTransport(HTTPTransport(SessionPool()), path)
+    with Molport(transport=transport) as molport:
+        molport.login(api_key=API_KEY)
+        molport.find("C1=CC=CC=C1", search_type=SearchType.EXACT)
+        molport.get_suppliers("Molport-002-325-020")
+    return path
+
+
+def test_request_key_ignores_credentials():
+    url = "https://api.molport.com/api/molecule/load?molecule=Molport-000-871-563&{}"
+    assert request_key("GET", url.format("apikey=a")) == request_key(
+        "GET", url.format("username=john&authenticationcode=b")
+    )
+    body = json.dumps({"Structure": "CCO", "API Key": "a"}).encode()
+    other = json.dumps({"User Name": "john", "Structure": "CCO"}).encode()
+    assert request_key("POST", "https://x", body) == request_key(
+        "POST", "https://x", other
+    )
+
+
+def test_recording_strips_credentials(archive):
+    with gzip.open(archive, "rt") as f:
+        lines = f.readlines()
+    assert len(lines) == 2
+    assert API_KEY not in "".join(lines)
+
+
+def test_recorder_never_closed(archive, mock_api):
+    recorder = RecordingTransport(HTTPTransport(SessionPool()), archive)
+    molport = Molport(transport=recorder)
+    molport.login(api_key=API_KEY)
+    molport.find("CCO", search_type=SearchType.EXACT)
+    # the recording process is killed before close, in the middle of a record
+    with open(archive, "ab") as f:
+        f.write(gzip.compress(b'{"key": "GET https://x"}\n')[:20])
+    assert len(list(read_archive(archive))) == 3
+    assert len(ReplayTransport(archive)) == 3
+
+
+def test_replay(archive, mock_api):
+    mock_api.calls.clear()
+    molport = Molport(transport=ReplayTransport(archive))
+    molport.login(username="john.spade", password="fasdga34a3")
+    assert len(molport.find("C1=CC=CC=C1", search_type=SearchType.EXACT)) == 8
+    response = molport.get_suppliers("Molport-002-325-020", return_response=True)
+    assert isinstance(response, ResponseSupplier)
+    assert mock_api.calls == []
+
+
+def test_replay_miss(archive):
+    molport = Molport(transport=ReplayTransport(archive))
+    molport.login(api_key=API_KEY)
+    with pytest.raises(ReplayMissError):
+        molport.find("CCO", search_type=SearchType.EXACT)
+
+
+def test_replay_error_rate(archive):
+    molport = Molport(transport=ReplayTransport(archive, error_rate=1.0))
+    molport.login(api_key=API_KEY)
+    with pytest.raises(requests.HTTPError):
+        molport.find("C1=CC=CC=C1", search_type=SearchType.EXACT)
+    with pytest.raises(ValueError, match="503"):
+        molport.get_suppliers("Molport-002-325-020")
+
+
+def test_replay_latency(archive, monkeypatch: MonkeyPatch):
+    delays = []
+    monkeypatch.setattr("time.sleep", delays.append)
+    transport = ReplayTransport(archive, latency=(0.1, 0.2), seed=42)
+    molport = Molport(transport=transport)
+    molport.login(api_key=API_KEY)
+    molport.get_suppliers("Molport-002-325-020")
+    assert len(delays) == 1
+    assert 0.1 <= delays[0] <= 0.2
+
+
+def test_replay_invalid_error_rate(archive):
+    with pytest.raises(ValueError):
+        ReplayTransport(archive, error_rate=1.5)
+
+
+def test_caching_transport(mock_api):
+    transport = CachingTransport(HTTPTransport(SessionPool()))
+    molport = Molport(transport=transport)
+    molport.login(api_key=API_KEY)
+    for _ in range(3):
+        molport.get_suppliers("Molport-002-325-020")
+    assert len(mock_api) == 1
+    assert (transport.hits, transport.misses) == (2, 1)
+
+
+def test_caching_transport_warm(archive, mock_api):
+    mock_api.calls.clear()
+    transport = CachingTransport(HTTPTransport(SessionPool()))
+    assert transport.warm(archive) == 2
+    molport = Molport(transport=transport)
+    molport.login(api_key=API_KEY)
+    molport.find("C1=CC=CC=C1", search_type=SearchType.EXACT)
+    molport.get_suppliers("Molport-002-325-020")
+    assert mock_api.calls == []
+
+
+def test_caching_transport_skips_errors(monkeypatch: MonkeyPatch):
+    data = {
+        "Result": {
+            "Status": 2,
+            "Message": "User is not recognized or allowed request count exceeded!",
+        },
+        "Data": {"Version": "v.3.0.2"},
+    }
+    monkeypatch.setattr(
+        "cloudscraper.CloudScraper.get", lambda *args, **kwargs: MockResponse(200, data)
+    )
+    transport = CachingTransport(HTTPTransport(SessionPool()))
+    transport.get("https://api.molport.com/api/molecule/load?molecule=1")
+    assert len(transport) == 0
+
+
+def test_transport_client(archive, tmp_path):
+    sessions = SessionPool()
+    http = HTTPTransport(sessions)
+    assert Molport(transport=http).client is sessions.seed
+    recording = RecordingTransport(http, tmp_path / "other.jsonl")
+    assert Molport(transport=CachingTransport(recording)).client is sessions.seed
+    recording.close()
+    assert Molport(transport=ReplayTransport(archive)).client is None
+    with pytest.raises(TypeError):
+        Transport()